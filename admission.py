@@ -0,0 +1,131 @@
+"""Admission control in front of the LLM path.
+
+RateLimiter gives every user a token bucket, so one user hammering the send
+button or a scripted client cannot monopolise upstream calls. AdmissionGate
+caps how many requests call the upstream at once. Requests over the cap
+wait in a bounded queue for a limited time and are shed when the queue is
+full or the wait runs out. In both cases the app answers from the cache or
+the fallback engine instead of returning an error.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class OverloadedError(Exception):
+    """Raised instead of calling the upstream when the request was shed."""
+
+
+class RateLimiter:
+    """Per-key token buckets holding up to `burst` tokens, refilled at `rate` per second.
+
+    Only the max_keys most recently seen keys are tracked; an evicted key
+    starts again with a full bucket. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def allow(self, key):
+        """Take a token for key, return False if its bucket is empty."""
+        if not self.rate:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = self.burst
+                while len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                self._buckets.move_to_end(key)
+            if tokens < 1:
+                self._buckets[key] = [tokens, now]
+                self.limited += 1
+                return False
+            self._buckets[key] = [tokens - 1, now]
+            self.allowed += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {'allowed': self.allowed, 'limited': self.limited, 'tracked_keys': len(self._buckets)}
+
+
+class AdmissionGate:
+    """Allows at most max_active concurrent upstream calls.
+
+    Up to max_waiting further requests wait, for at most wait_timeout
+    seconds each, for a slot to free up; anything beyond that is shed
+    immediately.
+    """
+
+    def __init__(self, max_active, max_waiting, wait_timeout):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; return False if shed."""
+        with self._cond:
+            if self.active < self.max_active and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.max_waiting:
+                self.shed_queue_full += 1
+                return False
+            self.waiting += 1
+            self.queued += 1
+            deadline = time.monotonic() + self.wait_timeout
+            try:
+                while self.active >= self.max_active:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed_timeout += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def call(self, fn):
+        """Run fn() in a slot, raising OverloadedError if the request is shed."""
+        if not self.acquire():
+            raise OverloadedError("Too many concurrent upstream calls")
+        try:
+            return fn()
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'queued': self.queued,
+                'shed_queue_full': self.shed_queue_full,
+                'shed_timeout': self.shed_timeout,
+            }
@@ -0,0 +1,149 @@
+"""Incrementally maintained usage analytics for the admin dashboard.
+
+Every answered turn bumps in-memory counters: question topic, answer
+source, answered/unanswered outcome and hourly volume. A background thread
+adds them to the analytics_counts and analytics_hourly tables every
+ANALYTICS_FLUSH_INTERVAL seconds. The dashboard reads only these rollups,
+never chat_history.
+
+To build the rollups from existing history once, run:
+
+    python analytics.py backfill
+"""
+import sys
+import threading
+from datetime import datetime, timezone
+
+from database import (add_analytics, get_analytics, clear_analytics, get_chat_history_after,
+                      get_faqs, init_db)
+
+
+class AnalyticsRollup:
+    def __init__(self, flush_interval=30.0):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._hourly = {}
+        self._stop = threading.Event()
+        self._thread = None
+        if flush_interval:
+            self._thread = threading.Thread(target=self._run, name='analytics-flush', daemon=True)
+            self._thread.start()
+
+    def record(self, topic, source, unanswered, hour=None):
+        """Count one answered question; hour is 'YYYY-MM-DD HH' in UTC, defaulting to now."""
+        if hour is None:
+            hour = datetime.now(timezone.utc).strftime('%Y-%m-%d %H')
+        outcome = 'unanswered' if unanswered else 'answered'
+        with self._lock:
+            for key in (('topic', topic), ('source', source), ('outcome', outcome)):
+                self._counts[key] = self._counts.get(key, 0) + 1
+            hourly = self._hourly.setdefault(hour, [0, 0])
+            hourly[0] += 1
+            if unanswered:
+                hourly[1] += 1
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            hourly, self._hourly = self._hourly, {}
+        if not counts and not hourly:
+            return
+        try:
+            add_analytics([(metric, key, count) for (metric, key), count in counts.items()],
+                          [(hour, values[0], values[1]) for hour, values in hourly.items()])
+        except Exception as e:
+            print(f"Error writing analytics, will retry: {e}")
+            with self._lock:
+                for key, count in counts.items():
+                    self._counts[key] = self._counts.get(key, 0) + count
+                for hour, values in hourly.items():
+                    pending = self._hourly.setdefault(hour, [0, 0])
+                    pending[0] += values[0]
+                    pending[1] += values[1]
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def snapshot(self, hours=24):
+        """Return the rollups plus not yet flushed counts, for the dashboard."""
+        counts, hourly = get_analytics(hours)
+        with self._lock:
+            for (metric, key), count in self._counts.items():
+                metric_counts = counts.setdefault(metric, {})
+                metric_counts[key] = metric_counts.get(key, 0) + count
+            for hour, values in self._hourly.items():
+                stored = hourly.setdefault(hour, [0, 0])
+                hourly[hour] = [stored[0] + values[0], stored[1] + values[1]]
+
+        outcomes = counts.get('outcome', {})
+        total = outcomes.get('answered', 0) + outcomes.get('unanswered', 0)
+        return {
+            'topics': sorted(counts.get('topic', {}).items(), key=lambda item: -item[1]),
+            'sources': dict(sorted(counts.get('source', {}).items())),
+            'total': total,
+            'unanswered': outcomes.get('unanswered', 0),
+            'unanswered_rate': round(outcomes.get('unanswered', 0) / total * 100, 1) if total else 0,
+            'hourly': sorted(hourly.items())[-hours:],
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def classify_turn(intent_engine, faq_answers, user_message, ai_response):
+    """Return (topic, source, unanswered) for a stored question/reply pair.
+
+    chat_history does not record where a reply came from, so the backfill
+    infers it from the reply text.
+    """
+    topic = intent_engine.classify(user_message) or 'other'
+    if ai_response in faq_answers:
+        return topic, 'faq', False
+    if ai_response == intent_engine.default_response:
+        return topic, 'fallback', True
+    if ai_response in intent_engine.responses:
+        return topic, 'fallback', False
+    return topic, 'llm', False
+
+
+def backfill(batch_size=5000):
+    """Rebuild the rollups from the whole chat_history table."""
+    from config import Config
+    from intents import IntentEngine, INTENTS, load_intents
+
+    init_db()
+    intent_engine = load_intents(Config.INTENTS_FILE) if Config.INTENTS_FILE else IntentEngine(INTENTS)
+    faq_answers = {faq[2] for faq in get_faqs()}
+
+    clear_analytics()
+    rollup = AnalyticsRollup(flush_interval=0)
+    pending = {}
+    after_id = 0
+    turns = 0
+    while True:
+        rows = get_chat_history_after(after_id, batch_size)
+        if not rows:
+            break
+        for message_id, user_id, sender, message, timestamp in rows:
+            if sender == 'user':
+                pending[user_id] = (message, timestamp)
+            elif user_id in pending:
+                question, asked_at = pending.pop(user_id)
+                topic, source, unanswered = classify_turn(intent_engine, faq_answers, question, message)
+                rollup.record(topic, source, unanswered, str(asked_at)[:13])
+                turns += 1
+        after_id = rows[-1][0]
+        rollup.flush()
+    print(f"Backfilled analytics from {turns} chat turns")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['backfill']:
+        print(__doc__)
+        sys.exit(1)
+    backfill()
@@ -1,10 +1,26 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
-from database import init_db, add_user, get_user, add_chat_message, get_chat_history, add_faq, get_faqs, get_faq, update_faq, delete_faq
+from flask import Flask, Response, g, render_template, request, jsonify, redirect, url_for, session
+from database import init_db, add_user, get_user, get_chat_page, add_faq, get_faqs, get_faq, update_faq, delete_faq, import_faqs, iter_faqs, bump_knowledge_version, get_knowledge_version
 import sqlite3
+import hashlib
 import json
+import threading
+import time
 from datetime import datetime
 import openai
 from config import Config
+from faq_index import FAQIndex
+from knowledge_snapshot import KnowledgeStore
+from faq_io import faq_format, read_faq_rows, write_faq_rows
+from intents import IntentEngine, INTENTS, load_intents
+from retrieval import FAQRetriever
+from llm_cache import ResponseCache
+from llm_guard import CircuitBreaker, DeadlineCaller
+from admission import AdmissionGate, OverloadedError, RateLimiter
+from chat_log import ChatLogWriter
+from analytics import AnalyticsRollup
+from conversation import ConversationContext, approx_tokens, format_context, is_follow_up
+from metrics import request_seconds, stage_seconds, db_seconds, answer_source, render_stats
+import atexit
 import os
 
 app = Flask(__name__)
@@ -16,26 +32,295 @@ if app.config['OPENAI_API_KEY']:
 else:
     print("OpenAI API key not found. Using fallback responses only.")
 
+# Allow pointing the client at a local stub completions server (see stub_llm.py)
+if app.config['OPENAI_API_BASE']:
+    openai.api_base = app.config['OPENAI_API_BASE']
+
 # Initialize database
 init_db()
 
+# Cached OpenAI answers are only valid for the current FAQ table
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+
+# FAQ matchers: a memory-mapped snapshot shared by all workers when
+# KNOWLEDGE_SNAPSHOT is set, otherwise per-process in-memory indexes.
+# Admin routes keep them in sync
+if app.config['KNOWLEDGE_SNAPSHOT']:
+    knowledge = KnowledgeStore(app.config['KNOWLEDGE_SNAPSHOT'], app.config['RETRIEVAL_DIM'],
+                               app.config['KNOWLEDGE_RELOAD_INTERVAL'],
+                               on_reload=lambda: response_cache.invalidate(shared=False))
+    knowledge.open(get_faqs, bump_knowledge_version)
+    faq_index = faq_retriever = knowledge
+else:
+    knowledge = None
+    faq_index = FAQIndex()
+    faq_retriever = FAQRetriever(app.config['RETRIEVAL_DIM'])
+
+# FAQ table version the in-process indexes were built from; other workers'
+# admin edits bump it in knowledge_meta and sync_faq_indexes() reloads
+_faq_sync = {'version': 0, 'checked_at': 0.0}
+_faq_sync_lock = threading.Lock()
+
+def load_faq_indexes():
+    version = get_knowledge_version()
+    faqs = get_faqs()
+    faq_index.load(faqs)
+    faq_retriever.load(faqs)
+    _faq_sync['version'] = version
+    _faq_sync['checked_at'] = time.monotonic()
+
+if knowledge is None:
+    load_faq_indexes()
+
+# Every OpenAI call runs under a hard deadline behind a circuit breaker
+llm_breaker = CircuitBreaker(app.config['LLM_BREAKER_FAILURES'], app.config['LLM_BREAKER_RESET'])
+llm_caller = DeadlineCaller(app.config['LLM_TIMEOUT'], app.config['LLM_HEDGE_AFTER'],
+                            app.config['LLM_WORKERS'], llm_breaker)
+
+# Per-user rate limit and a global cap on concurrent OpenAI calls; requests
+# over either limit are answered from the cache or the fallback engine
+rate_limiter = RateLimiter(app.config['RATE_LIMIT_PER_MINUTE'] / 60, app.config['RATE_LIMIT_BURST'])
+llm_gate = AdmissionGate(app.config['LLM_MAX_CONCURRENT'], app.config['LLM_QUEUE_SIZE'],
+                         app.config['LLM_QUEUE_TIMEOUT'])
+
+# Chat turns are written to chat_history in batches by a background thread
+chat_log = ChatLogWriter(app.config['CHAT_LOG_BATCH_SIZE'], app.config['CHAT_LOG_FLUSH_INTERVAL'],
+                         app.config['CHAT_LOG_QUEUE_SIZE'], app.config['CHAT_LOG_PUT_TIMEOUT'])
+atexit.register(chat_log.close)
+
+# Topic, source and volume counters for the admin dashboard
+analytics = AnalyticsRollup(app.config['ANALYTICS_FLUSH_INTERVAL'])
+atexit.register(analytics.close)
+
+# Recent turns and a summary of older ones per user, for follow-up questions
+conversation = ConversationContext(app.config['CONTEXT_WINDOW_MESSAGES'], app.config['CONTEXT_SUMMARY_TOKENS'],
+                                   app.config['CONTEXT_HISTORY_MESSAGES'])
+
+def index_faq(faq_id, question, answer):
+    if knowledge is not None:
+        return reload_faq_indexes()
+    faq_index.add(faq_id, question, answer)
+    faq_retriever.add(faq_id, question, answer)
+    note_faq_edit()
+    response_cache.invalidate()
+
+def unindex_faq(faq_id):
+    if knowledge is not None:
+        return reload_faq_indexes()
+    faq_index.remove(faq_id)
+    faq_retriever.remove(faq_id)
+    note_faq_edit()
+    response_cache.invalidate()
+
+# Rebuild every FAQ-derived structure from the table, e.g. after a bulk import
+def reload_faq_indexes():
+    if knowledge is not None:
+        # Other workers pick the new snapshot up on their next lookup
+        knowledge.rebuild(get_faqs, bump_knowledge_version)
+        response_cache.invalidate()
+        return
+    with _faq_sync_lock:
+        bump_knowledge_version()
+        load_faq_indexes()
+    response_cache.invalidate()
+
+# Tell other workers about an edit this worker has already applied locally
+def note_faq_edit():
+    with _faq_sync_lock:
+        version = bump_knowledge_version()
+        if version == _faq_sync['version'] + 1:
+            _faq_sync['version'] = version
+        else:
+            # Another worker edited the table since our last sync
+            load_faq_indexes()
+
+# Reload the in-process indexes if another worker changed the FAQ table,
+# checking the version at most every KNOWLEDGE_RELOAD_INTERVAL seconds
+def sync_faq_indexes():
+    if knowledge is not None:
+        return
+    if time.monotonic() - _faq_sync['checked_at'] < app.config['KNOWLEDGE_RELOAD_INTERVAL']:
+        return
+    with _faq_sync_lock:
+        if time.monotonic() - _faq_sync['checked_at'] < app.config['KNOWLEDGE_RELOAD_INTERVAL']:
+            return
+        _faq_sync['checked_at'] = time.monotonic()
+        if get_knowledge_version() == _faq_sync['version']:
+            return
+        load_faq_indexes()
+    # The editing worker cleared the shared tier, drop only our memory tier
+    response_cache.invalidate(shared=False)
+
+# Compile the fallback keyword engine once, from INTENTS_FILE if configured
+if app.config['INTENTS_FILE']:
+    intent_engine = load_intents(app.config['INTENTS_FILE'])
+else:
+    intent_engine = IntentEngine(INTENTS)
+
 # Enhanced AI response function with fallback
 def get_ai_response(message, user_id=None):
+    ai_response, source = answer_message(message, user_id)
+    answer_source.inc(source)
+    return ai_response
+
+# Returns (reply, source), source being faq, faq_retrieval, llm or fallback
+def answer_message(message, user_id=None):
     # First check if we have a predefined answer in our FAQ database
-    try:
-        faqs = get_faqs()
-        for faq in faqs:
-            if faq[1].lower() in message.lower():
-                return faq[2]
-    except Exception as e:
-        print(f"Error accessing FAQs: {e}")
+    faq_answer, source = get_faq_response(message)
+    if faq_answer is not None:
+        return faq_answer, source
     
     # If no predefined answer, try OpenAI
     try:
         # Only try OpenAI if the API key is configured
         if app.config['OPENAI_API_KEY']:
-            # Create a BBC College-specific prompt for OpenAI
-            prompt = f"""You are a helpful college enquiry chatbot for BBC College (https://bbc.edu.in/). 
+            with stage_seconds.time('context'):
+                prompt, context_key = build_conversation_prompt(message, user_id)
+            # Cached answers cost nothing upstream, so only a miss is charged to the rate limit
+            cached = response_cache.get(message, context_key, count_miss=False)
+            if cached is not None:
+                return cached, 'llm'
+            if user_id is not None and not rate_limiter.allow(user_id):
+                return get_fallback_response(message), 'fallback'
+            with stage_seconds.time('llm'):
+                return response_cache.get_or_compute(
+                    message, lambda: llm_gate.call(
+                        lambda: llm_caller.call(lambda: get_openai_response(message, prompt))),
+                    context_key), 'llm'
+        else:
+            # If no OpenAI API key, use fallback
+            return get_fallback_response(message), 'fallback'
+    
+    except OverloadedError:
+        # Shed by the admission gate, counted in llm_gate.stats()
+        return get_fallback_response(message), 'fallback'
+    except Exception as e:
+        print(f"OpenAI error, using fallback: {e}")
+        # If OpenAI fails, use the fallback response system
+        return get_fallback_response(message), 'fallback'
+
+# Answer from the FAQ table, exact question match first, then paraphrases
+def get_faq_response(message):
+    try:
+        sync_faq_indexes()
+        with stage_seconds.time('faq_match'):
+            faq_answer = faq_index.match(message)
+        if faq_answer is not None:
+            return faq_answer, 'faq'
+        
+        with stage_seconds.time('faq_retrieval'):
+            faq_answer = faq_retriever.best(message, app.config['RETRIEVAL_THRESHOLD'],
+                                             app.config['RETRIEVAL_MIN_TERMS'])
+        if faq_answer is not None:
+            return faq_answer, 'faq_retrieval'
+    except Exception as e:
+        print(f"Error accessing FAQs: {e}")
+    return None, None
+
+# Streaming variant of get_ai_response, yields the reply in pieces
+def stream_ai_response(message, user_id=None, outcome=None):
+    # outcome['source'] is set to where the reply came from
+    if outcome is None:
+        outcome = {}
+    faq_answer, source = get_faq_response(message)
+    if faq_answer is not None:
+        outcome['source'] = source
+        yield faq_answer
+        return
+    
+    if not app.config['OPENAI_API_KEY']:
+        outcome['source'] = 'fallback'
+        yield get_fallback_response(message)
+        return
+    
+    prompt, context_key = build_conversation_prompt(message, user_id)
+    cached = response_cache.get(message, context_key)
+    if cached is not None:
+        outcome['source'] = 'llm'
+        yield cached
+        return
+    
+    if user_id is not None and not rate_limiter.allow(user_id):
+        outcome['source'] = 'fallback'
+        yield get_fallback_response(message)
+        return
+    
+    if not llm_gate.acquire():
+        outcome['source'] = 'fallback'
+        yield get_fallback_response(message)
+        return
+    
+    try:
+        yield from stream_openai_response(message, prompt, context_key, outcome)
+    finally:
+        llm_gate.release()
+
+# Streams the OpenAI completion for prompt under the LLM_TIMEOUT deadline. Falls
+# back if it fails before any text, otherwise the reply just ends there.
+def stream_openai_response(message, prompt, context_key, outcome):
+    parts = []
+    start = time.perf_counter()
+    # Created after taking a gate slot: a half-open probe let through by the
+    # breaker always reaches the upstream and records its outcome
+    chunks = llm_caller.stream(lambda: openai.Completion.create(
+        engine="gpt-3.5-turbo-instruct",
+        prompt=prompt,
+        max_tokens=250,
+        temperature=0.7,
+        top_p=1,
+        frequency_penalty=0.5,
+        presence_penalty=0.5,
+        stream=True,
+        request_timeout=app.config['LLM_TIMEOUT']
+    ))
+    try:
+        for chunk in chunks:
+            text = chunk.choices[0].text
+            if not parts:
+                # The completion usually opens with whitespace, strip it like the blocking path does
+                text = text.lstrip()
+                if not text:
+                    continue
+                stage_seconds.observe('llm_first_token', time.perf_counter() - start)
+            parts.append(text)
+            yield text
+    except Exception as e:
+        print(f"OpenAI error, using fallback: {e}")
+        if not parts:
+            outcome['source'] = 'fallback'
+            yield get_fallback_response(message)
+        else:
+            outcome['source'] = 'llm'
+        return
+    finally:
+        chunks.close()
+    
+    stage_seconds.observe('llm', time.perf_counter() - start)
+    if parts:
+        outcome['source'] = 'llm'
+        response_cache.put(message, ''.join(parts).strip(), context_key)
+    else:
+        outcome['source'] = 'fallback'
+        yield get_fallback_response(message)
+
+# Prompt with the user's conversation so far for follow-up questions, kept under
+# PROMPT_TOKEN_BUDGET. Also returns a key identifying the context so cached
+# answers are not shared between different conversations.
+def build_conversation_prompt(message, user_id=None):
+    base = build_prompt(message)
+    if user_id is None or not is_follow_up(message):
+        return base, ''
+    summary, window = conversation.get(user_id)
+    context = format_context(summary, window, app.config['PROMPT_TOKEN_BUDGET'] - approx_tokens(base))
+    if not context:
+        return base, ''
+    return build_prompt(message, context), hashlib.sha1(context.encode('utf-8')).hexdigest()
+
+# Create a BBC College-specific prompt for OpenAI
+def build_prompt(message, context=''):
+    if context:
+        context = f"\n            {context}\n            "
+    return f"""You are a helpful college enquiry chatbot for BBC College (https://bbc.edu.in/). 
             Provide accurate, helpful information about BBC College. 
             
             Important information about BBC College:
@@ -47,99 +332,45 @@ def get_ai_response(message, user_id=None):
             
             If you don't know something specific about BBC College, politely say so and suggest 
             contacting the college directly or visiting their website https://bbc.edu.in/
-            
+            {context}
             User question: {message}
             
             Helpful response as BBC College chatbot:"""
-            
-            response = openai.Completion.create(
-                engine="gpt-3.5-turbo-instruct",
-                prompt=prompt,
-                max_tokens=250,
-                temperature=0.7,
-                top_p=1,
-                frequency_penalty=0.5,
-                presence_penalty=0.5
-            )
-            
-            return response.choices[0].text.strip()
-        else:
-            # If no OpenAI API key, use fallback
-            return get_fallback_response(message)
+
+def get_openai_response(message, prompt=None):
+    response = openai.Completion.create(
+        engine="gpt-3.5-turbo-instruct",
+        prompt=prompt or build_prompt(message),
+        max_tokens=250,
+        temperature=0.7,
+        top_p=1,
+        frequency_penalty=0.5,
+        presence_penalty=0.5,
+        request_timeout=app.config['LLM_TIMEOUT']
+    )
     
-    except Exception as e:
-        print(f"OpenAI error, using fallback: {e}")
-        # If OpenAI fails, use the fallback response system
-        return get_fallback_response(message)
+    return response.choices[0].text.strip()
 
 # BBC College-specific response function
 def get_fallback_response(message):
-    message_lower = message.lower()
-    
-    # BBC College-related responses
-    response_map = {
-        'admission': {
-            'triggers': ['admission', 'admit', 'apply', 'application', 'enroll', 'enrollment'],
-            'response': "BBC College offers admissions to various undergraduate and postgraduate programs. The admission process typically begins in May each year. You'll need to submit your academic transcripts, identification documents, and complete the application form available on our website or at the admission office."
-        },
-        'courses': {
-            'triggers': ['course', 'program', 'degree', 'study', 'major', 'curriculum', 'bachelor', 'master', 'bba', 'bca', 'mba'],
-            'response': "BBC College offers a wide range of programs including:\n\n- BBA (Bachelor of Business Administration)\n- BCA (Bachelor of Computer Applications)\n- MBA (Master of Business Administration)\n- Various other undergraduate and postgraduate programs\n\nVisit our website https://bbc.edu.in/ for detailed information about each program."
-        },
-        'fees': {
-            'triggers': ['fee', 'cost', 'tuition', 'price', 'payment', 'financial', 'scholarship'],
-            'response': "The fee structure varies by program at BBC College. For detailed information about tuition fees, payment schedules, and scholarship opportunities, please contact our admission office at +91-XXXXXXXXXX or visit our campus. We offer various scholarship programs for deserving students."
-        },
-        'contact': {
-            'triggers': ['contact', 'email', 'phone', 'address', 'location', 'where', 'visit'],
-            'response': "You can contact BBC College at:\n\nAddress: BBC Educational Campus, [City/Area], [State], India\nPhone: +91-XXXXXXXXXX\nEmail: info@bbc.edu.in\nWebsite: https://bbc.edu.in/\n\nVisit our website for more contact details and location information."
-        },
-        'facility': {
-            'triggers': ['facility', 'library', 'lab', 'laboratory', 'hostel', 'accommodation', 'sports', 'canteen'],
-            'response': "BBC College provides excellent facilities including:\n- Well-equipped library with extensive resources\n- Modern computer labs with latest technology\n- Science laboratories for practical learning\n- Hostel accommodation for outstation students\n- Sports facilities and playground\n- Cafeteria serving hygienic food\n\nVisit our campus to see these facilities firsthand."
-        },
-        'placement': {
-            'triggers': ['placement', 'job', 'career', 'internship', 'company', 'recruitment'],
-            'response': "BBC College has a dedicated placement cell that works with various industries to provide placement opportunities for our students. We have a good track record of placements in reputed companies. The placement cell also organizes training programs, workshops, and pre-placement talks to prepare students for their careers."
-        },
-        'about': {
-            'triggers': ['about', 'history', 'establish', 'found', 'vision', 'mission'],
-            'response': "BBC College is a premier educational institution committed to providing quality education. We focus on holistic development of students through academic excellence, extracurricular activities, and value-based education. Our vision is to create responsible citizens and future leaders through innovative teaching methods and practical learning experiences."
-        },
-        'greeting': {
-            'triggers': ['hi', 'hello', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening'],
-            'response': "Hello! Welcome to BBC College enquiry chatbot. How can I assist you with information about our college today?"
-        },
-        'thanks': {
-            'triggers': ['thank', 'thanks', 'appreciate', 'grateful'],
-            'response': "You're welcome! Is there anything else you'd like to know about BBC College? Feel free to ask any questions about admissions, courses, facilities, or any other aspect of our college."
-        },
-        'goodbye': {
-            'triggers': ['bye', 'goodbye', 'see you', 'farewell', 'exit', 'quit'],
-            'response': "Thank you for contacting BBC College. Have a great day! If you have more questions later, feel free to chat with us again. You can also visit our website https://bbc.edu.in/ for more information."
-        },
-        'website': {
-            'triggers': ['website', 'online', 'portal', 'web', 'internet'],
-            'response': "Our official website is https://bbc.edu.in/. You can find detailed information about all our programs, admission procedures, faculty, facilities, and much more on our website. You can also contact us through the website for specific queries."
-        },
-        'faculty': {
-            'triggers': ['faculty', 'professor', 'teacher', 'instructor', 'lecturer', 'staff'],
-            'response': "BBC College has highly qualified and experienced faculty members who are dedicated to providing quality education. Our teachers are experts in their respective fields and use innovative teaching methods to ensure effective learning. Many of our faculty members have industry experience and advanced degrees."
-        },
-        'timing': {
-            'triggers': ['timing', 'time', 'hour', 'schedule', 'when', 'open', 'close'],
-            'response': "The college timing is typically from 9:00 AM to 4:00 PM, Monday to Friday. However, specific timings may vary for different programs and departments. The administrative office is open from 9:00 AM to 5:00 PM on working days. Please contact the college for specific schedule information."
-        }
-    }
-    
-    # Check for keywords in the message
-    for category, data in response_map.items():
-        for trigger in data['triggers']:
-            if trigger in message_lower:
-                return data['response']
-    
-    # Default response if no keywords matched
-    return "I'm not sure I understand your question about BBC College. Could you please rephrase it? I can help with information about admissions, courses, fees, facilities, placements, faculty, and other aspects of our college. You can also visit our website https://bbc.edu.in/ for detailed information."
+    with stage_seconds.time('fallback'):
+        return intent_engine.respond(message)
+
+# Time every request by endpoint. A streamed response is still running when
+# after_request fires, so it is timed when the server closes it instead
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    if request.endpoint and request.endpoint != 'static':
+        endpoint, start = request.endpoint, g.request_start
+        if response.is_streamed:
+            response.call_on_close(lambda: request_seconds.observe(endpoint, time.perf_counter() - start))
+        else:
+            request_seconds.observe(endpoint, time.perf_counter() - start)
+    return response
 
 @app.route('/')
 def index():
@@ -202,8 +433,37 @@ def chat():
     if session.get('is_admin'):
         return redirect(url_for('admin_dashboard'))
     
-    chat_history = get_chat_history(session['user_id'])
-    return render_template('chat.html', username=session['username'], chat_history=chat_history)
+    # Make sure turns still waiting in the write-behind queue are visible
+    chat_log.flush()
+    # Only the most recent page is rendered, older pages load from /chat/history on scroll
+    chat_history, has_more = get_chat_page(session['user_id'], app.config['CHAT_PAGE_SIZE'])
+    history_cursor = history_cursor_for(chat_history) if has_more else None
+    return render_template('chat.html', username=session['username'], chat_history=chat_history,
+                           history_cursor=history_cursor)
+
+# Keyset cursor for the page before the given rows, as "timestamp|id"
+def history_cursor_for(rows):
+    return f"{rows[0][2]}|{rows[0][3]}"
+
+@app.route('/chat/history')
+def chat_history_page():
+    if 'user_id' not in session:
+        return jsonify({'status': 'error', 'message': 'Not logged in'})
+    
+    before = None
+    cursor = request.args.get('before')
+    if cursor:
+        try:
+            timestamp, message_id = cursor.rsplit('|', 1)
+            before = (timestamp, int(message_id))
+        except ValueError:
+            return jsonify({'status': 'error', 'message': 'Invalid cursor'})
+    limit = max(1, min(request.args.get('limit', app.config['CHAT_PAGE_SIZE'], type=int), 200))
+    
+    rows, has_more = get_chat_page(session['user_id'], limit, before)
+    messages = [{'sender': row[0], 'message': row[1], 'timestamp': row[2]} for row in rows]
+    next_cursor = history_cursor_for(rows) if has_more and rows else None
+    return jsonify({'status': 'success', 'messages': messages, 'next_cursor': next_cursor})
 
 @app.route('/send_message', methods=['POST'])
 def send_message():
@@ -211,20 +471,75 @@ def send_message():
         return jsonify({'status': 'error', 'message': 'Not logged in'})
     
     user_message = request.json['message']
-    ai_response = get_ai_response(user_message, session['user_id'])
+    if request.json.get('stream'):
+        return Response(stream_message(session['user_id'], user_message),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    ai_response, source = answer_message(user_message, session['user_id'])
     
     # Save messages to database
-    add_chat_message(session['user_id'], 'user', user_message)
-    add_chat_message(session['user_id'], 'ai', ai_response)
+    record_turn(session['user_id'], user_message, ai_response, source)
     
     return jsonify({'status': 'success', 'response': ai_response})
 
+# Server-sent events for a streamed reply; the chat turn is saved once the reply is complete
+def stream_message(user_id, user_message):
+    parts = []
+    outcome = {}
+    try:
+        for text in stream_ai_response(user_message, user_id, outcome):
+            parts.append(text)
+            yield f"data: {json.dumps({'token': text})}\n\n"
+    finally:
+        if parts:
+            record_turn(user_id, user_message, ''.join(parts).strip(), outcome.get('source', 'llm'))
+    yield f"data: {json.dumps({'done': True})}\n\n"
+
+# Everything that happens once a reply has been produced: history, context, counters
+def record_turn(user_id, user_message, ai_response, source):
+    answer_source.inc(source)
+    with stage_seconds.time('chat_log'):
+        timestamp = chat_log.add(user_id, 'user', user_message)
+        chat_log.add(user_id, 'ai', ai_response, timestamp)
+    conversation.record(user_id, user_message, ai_response, timestamp)
+    topic = intent_engine.classify(user_message) or 'other'
+    unanswered = source == 'fallback' and ai_response == intent_engine.default_response
+    analytics.record(topic, source, unanswered)
+
 @app.route('/admin')
 def admin_dashboard():
     if 'user_id' not in session or not session.get('is_admin'):
         return redirect(url_for('login'))
     
-    return render_template('admin.html')
+    return render_template('admin.html', performance=performance_summary(),
+                           analytics=analytics.snapshot(app.config['ANALYTICS_HOURS']))
+
+# Latency and answer-source summary for the admin dashboard
+def performance_summary():
+    return {
+        'stages': stage_seconds.summary(),
+        'routes': request_seconds.summary(),
+        'database': db_seconds.summary(),
+        'sources': answer_source.values(),
+    }
+
+@app.route('/metrics')
+def metrics():
+    lines = []
+    for metric in (request_seconds, stage_seconds, db_seconds, answer_source):
+        lines.extend(metric.render())
+    lines.extend(render_stats('chatbot_response_cache', 'LLM response cache', 'event',
+                              response_cache.stats(), gauges=('size', 'max_size')))
+    lines.extend(render_stats('chatbot_llm_calls', 'Deadline-bounded OpenAI call', 'event',
+                              llm_caller.stats()))
+    lines.extend(render_stats('chatbot_rate_limit', 'Per-user LLM rate limiter', 'event',
+                              rate_limiter.stats(), gauges=('tracked_keys',)))
+    lines.extend(render_stats('chatbot_llm_admission', 'Concurrent OpenAI call gate', 'event',
+                              llm_gate.stats(), gauges=('active', 'waiting')))
+    lines.extend(render_stats('chatbot_chat_log', 'Write-behind chat log', 'event',
+                              chat_log.stats(), gauges=('queued',)))
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
 @app.route('/admin/queries')
 def admin_queries():
@@ -242,8 +557,9 @@ def add_query():
     question = request.json['question']
     answer = request.json['answer']
     
-    add_faq(question, answer)
-    return jsonify({'status': 'success'})
+    faq_id = add_faq(question, answer)
+    index_faq(faq_id, question, answer)
+    return jsonify({'status': 'success', 'id': faq_id})
 
 @app.route('/admin/update_query/<int:faq_id>', methods=['POST'])
 def update_query(faq_id):
@@ -254,6 +570,7 @@ def update_query(faq_id):
     answer = request.json['answer']
     
     update_faq(faq_id, question, answer)
+    index_faq(faq_id, question, answer)
     return jsonify({'status': 'success'})
 
 @app.route('/admin/delete_query/<int:faq_id>', methods=['POST'])
@@ -262,8 +579,55 @@ def delete_query(faq_id):
         return jsonify({'status': 'error', 'message': 'Unauthorized'})
     
     delete_faq(faq_id)
+    unindex_faq(faq_id)
     return jsonify({'status': 'success'})
 
+@app.route('/admin/import_faqs', methods=['POST'])
+def import_faqs_route():
+    if 'user_id' not in session or not session.get('is_admin'):
+        return jsonify({'status': 'error', 'message': 'Unauthorized'})
+    
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'status': 'error', 'message': 'No file uploaded'})
+    
+    counts = {}
+    try:
+        added, skipped = import_faqs(read_faq_rows(upload.stream, faq_format(upload.filename)), counts=counts)
+    except (ValueError, KeyError, UnicodeDecodeError) as e:
+        return jsonify({'status': 'error', 'message': f'Could not read file: {e}'})
+    finally:
+        # One rebuild for the whole file instead of one per row. Rows in chunks
+        # committed before a bad line stay imported, whatever the error
+        if counts.get('added'):
+            reload_faq_indexes()
+    return jsonify({'status': 'success', 'added': added, 'skipped': skipped})
+
+@app.route('/admin/export_faqs')
+def export_faqs():
+    if 'user_id' not in session or not session.get('is_admin'):
+        return redirect(url_for('login'))
+    
+    fmt = 'jsonl' if request.args.get('format') == 'jsonl' else 'csv'
+    mimetype = 'application/x-ndjson' if fmt == 'jsonl' else 'text/csv'
+    return Response(write_faq_rows(iter_faqs(), fmt), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=faqs.{fmt}'})
+
+@app.route('/admin/cache_stats')
+def cache_stats():
+    if 'user_id' not in session or not session.get('is_admin'):
+        return jsonify({'status': 'error', 'message': 'Unauthorized'})
+    
+    return jsonify({'status': 'success', 'cache': response_cache.stats()})
+
+@app.route('/admin/llm_stats')
+def llm_stats():
+    if 'user_id' not in session or not session.get('is_admin'):
+        return jsonify({'status': 'error', 'message': 'Unauthorized'})
+    
+    return jsonify({'status': 'success', 'llm': llm_caller.stats(), 'admission': llm_gate.stats(),
+                    'rate_limit': rate_limiter.stats()})
+
 @app.route('/test_openai')
 def test_openai():
     """Test route to check if OpenAI API is working"""
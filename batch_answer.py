@@ -0,0 +1,165 @@
+"""Answer a file of questions offline through the chatbot pipeline.
+
+Questions are read lazily from a JSONL file (objects with a "question" and
+optional "id" field) or a CSV file (a "question" column, else the first
+column) and passed through answer_message by a bounded thread pool.
+Each answer is appended to the output JSONL file as soon as it is ready.
+The output doubles as the checkpoint, so rerunning the same command
+skips questions that already have an answer. With --stub-latency the run
+uses a temporary copy of the database, so stub answers never reach the
+live response cache.
+
+    python batch_answer.py questions.jsonl answers.jsonl --workers 8
+    python batch_answer.py questions.csv answers.jsonl --stub-latency 0.5
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def read_questions(path):
+    """Yield (index, id, question) for every question in the input file."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            reader = csv.reader(f)
+            first = next(reader, None)
+            if first is None:
+                return
+            header = [name.strip().lower() for name in first]
+            if 'question' in header:
+                column = header.index('question')
+                id_column = header.index('id') if 'id' in header else None
+                start = 0
+            else:
+                # No header row, the first line is already a question
+                column, id_column, start = 0, None, 1
+                yield 0, None, first[0]
+            for index, row in enumerate(reader, start=start):
+                if row:
+                    yield index, row[id_column] if id_column is not None else None, row[column]
+        else:
+            for index, line in enumerate(f):
+                line = line.strip()
+                if line:
+                    item = json.loads(line)
+                    yield index, item.get('id'), item['question']
+
+
+def read_checkpoint(path):
+    """Return the input indexes that already have an answer in the output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['index'])
+            except (ValueError, KeyError):
+                # A line cut short by an interruption, the question is redone
+                continue
+    return done
+
+
+def copy_database(path):
+    """Copy the SQLite database at path into a temporary directory, return the copy's path."""
+    copy = os.path.join(tempfile.mkdtemp(prefix='chatbot-batch-'), os.path.basename(path))
+    if os.path.exists(path):
+        source = sqlite3.connect(path)
+        target = sqlite3.connect(copy)
+        source.backup(target)
+        target.close()
+        source.close()
+    return copy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('input', help='questions file (.jsonl or .csv)')
+    parser.add_argument('output', help='answers file (.jsonl), also used to resume')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent questions')
+    parser.add_argument('--restart', action='store_true', help='ignore existing answers and start over')
+    parser.add_argument('--report-every', type=int, default=100, help='progress line every N answers')
+    parser.add_argument('--stub-latency', type=float, default=None,
+                        help='answer LLM calls from a local stub with this latency instead of OpenAI')
+    args = parser.parse_args()
+
+    if args.stub_latency is not None:
+        from stub_llm import start_stub_server
+        stub = start_stub_server(latency=args.stub_latency)
+        os.environ['OPENAI_API_BASE'] = stub.api_base
+        os.environ['OPENAI_API_KEY'] = os.environ.get('OPENAI_API_KEY') or 'stub'
+
+    # Imported late so the environment above is seen by Config
+    from config import Config
+    if args.stub_latency is not None:
+        # Stub answers must not reach the live response_cache or chat tables, so
+        # run against a throwaway copy of the database that keeps the FAQs
+        Config.DATABASE = copy_database(Config.DATABASE)
+    # --workers already bounds concurrent upstream calls, never shed batch questions
+    Config.LLM_MAX_CONCURRENT = max(Config.LLM_MAX_CONCURRENT, args.workers)
+    Config.LLM_WORKERS = max(Config.LLM_WORKERS, args.workers)
+    from app import answer_message
+
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    done = read_checkpoint(args.output)
+    if done:
+        print(f"Resuming, {len(done)} questions already answered")
+
+    lock = threading.Lock()
+    # Bound the questions in flight so large inputs are never fully in memory
+    slots = threading.BoundedSemaphore(args.workers * 2)
+    counts = {'answered': 0, 'fallback': 0, 'failed': 0}
+    started = time.monotonic()
+
+    def answer(out, index, question_id, question):
+        try:
+            t0 = time.monotonic()
+            try:
+                response, source = answer_message(question)
+                error = None
+            except Exception as e:
+                response, source, error = None, None, str(e)
+            record = {'index': index, 'id': question_id, 'question': question, 'answer': response,
+                      'source': source, 'seconds': round(time.monotonic() - t0, 4)}
+            if error is not None:
+                record['error'] = error
+            with lock:
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+                counts['failed' if error else 'answered'] += 1
+                if source == 'fallback':
+                    # Canned keyword answers, e.g. after an upstream timeout
+                    counts['fallback'] += 1
+                total = counts['answered'] + counts['failed']
+                if total % args.report_every == 0:
+                    elapsed = time.monotonic() - started
+                    print(f"{total} answered, {total / elapsed:.1f} questions/s")
+        finally:
+            slots.release()
+
+    with open(args.output, 'a', encoding='utf-8') as out:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            for index, question_id, question in read_questions(args.input):
+                if index in done:
+                    continue
+                slots.acquire()
+                pool.submit(answer, out, index, question_id, question)
+
+    elapsed = time.monotonic() - started
+    total = counts['answered'] + counts['failed']
+    rate = total / elapsed if elapsed else 0
+    print(f"Done: {counts['answered']} answered ({counts['fallback']} by fallback), {counts['failed']} failed "
+          f"in {elapsed:.1f}s ({rate:.1f} questions/s)")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""Load and latency benchmark for the chat and admin endpoints.
+
+Drives the Flask app in-process through its test client from several
+threads with a fixed, seeded mix of traffic: FAQ questions, paraphrases,
+repeated and novel questions for the LLM path, chat page loads, history
+scroll-back and admin FAQ edits. OpenAI is replaced by the local stub from
+stub_llm.py with configurable latency, and the benchmark runs against a
+throwaway database whose chat_history is seeded at each requested size.
+
+Per route and per pipeline stage it reports throughput and p50/p95/p99
+latency, and writes everything to a JSON file. Pass --compare with an
+earlier results file to print the differences and fail on p95 regressions.
+
+    python benchmark.py --sizes 0,1000,10000 --concurrency 8 --output bench.json
+    python benchmark.py --compare bench.json --output bench_new.json
+"""
+import argparse
+import functools
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+FAQ_QUESTIONS = [
+    "How can I contact BBC College?",
+    "What programs does BBC College offer?",
+    "Does BBC College provide hostel facilities?",
+    "What is the fee structure at BBC College?",
+]
+PARAPHRASES = [
+    "do you have hostel facilities",
+    "what facilities are available on campus",
+    "fee structure for MBA",
+    "placement opportunities",
+]
+REPEATED_QUESTIONS = [
+    "Is there a bus service to the campus?",
+    "Can I do a part time course?",
+    "Do you accept lateral entry students?",
+]
+SMALLTALK_QUESTIONS = ["hi", "thanks a lot", "bye"]
+
+# (name, weight) of each kind of request in the traffic mix
+TRAFFIC_MIX = [
+    ('send_message:faq', 25),
+    ('send_message:paraphrase', 15),
+    ('send_message:llm_repeat', 15),
+    ('send_message:llm_novel', 10),
+    ('send_message:smalltalk', 5),
+    ('chat', 15),
+    ('chat_history', 10),
+    ('admin_queries', 2),
+    ('admin_add_query', 1),
+    ('admin_update_query', 1),
+    ('admin_delete_query', 1),
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples, elapsed):
+    values = sorted(samples)
+    return {
+        'count': len(values),
+        'throughput': round(len(values) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else None,
+        'p50_ms': round(percentile(values, 50) * 1000, 3) if values else None,
+        'p95_ms': round(percentile(values, 95) * 1000, 3) if values else None,
+        'p99_ms': round(percentile(values, 99) * 1000, 3) if values else None,
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def add(self, name, seconds, ok=True):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+            self.errors = {}
+
+
+def instrument_stages(app_module, recorder):
+    """Wrap the pipeline stages of app_module so each call is timed into recorder."""
+    def timed(name, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                recorder.add(name, time.perf_counter() - t0)
+        return wrapper
+
+    app_module.faq_index.match = timed('faq_match', app_module.faq_index.match)
+    app_module.faq_retriever.best = timed('faq_retrieval', app_module.faq_retriever.best)
+    app_module.response_cache.get_or_compute = timed('llm_cached_call', app_module.response_cache.get_or_compute)
+    app_module.get_openai_response = timed('llm_upstream', app_module.get_openai_response)
+    app_module.get_fallback_response = timed('fallback', app_module.get_fallback_response)
+    app_module.chat_log.add = timed('chat_log_enqueue', app_module.chat_log.add)
+    app_module.get_chat_page = timed('db_chat_page', app_module.get_chat_page)
+
+
+def seed_history(database, user_id, size):
+    start = datetime.now(timezone.utc) - timedelta(seconds=size)
+    rows = []
+    for i in range(size):
+        timestamp = (start + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S')
+        sender = 'user' if i % 2 == 0 else 'ai'
+        rows.append((user_id, sender, f"Seeded message {i} about admissions and fees", timestamp))
+        if len(rows) == 5000:
+            database.add_chat_messages(rows)
+            rows = []
+    if rows:
+        database.add_chat_messages(rows)
+
+
+def run_worker(app_module, recorder, user_id, requests, seed, novel_counter):
+    rng = random.Random(seed)
+    names = [name for name, _ in TRAFFIC_MIX]
+    weights = [weight for _, weight in TRAFFIC_MIX]
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+        sess['username'] = f'bench{user_id}'
+    admin = app_module.app.test_client()
+    with admin.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['username'] = 'admin'
+        sess['is_admin'] = True
+    own_faqs = []
+
+    for _ in range(requests):
+        kind = rng.choices(names, weights)[0]
+        t0 = time.perf_counter()
+        if kind.startswith('send_message'):
+            if kind.endswith('faq'):
+                message = rng.choice(FAQ_QUESTIONS)
+            elif kind.endswith('paraphrase'):
+                message = rng.choice(PARAPHRASES)
+            elif kind.endswith('llm_repeat'):
+                message = rng.choice(REPEATED_QUESTIONS)
+            elif kind.endswith('llm_novel'):
+                message = f"Tell me about elective number {next(novel_counter)}"
+            else:
+                message = rng.choice(SMALLTALK_QUESTIONS)
+            response = client.post('/send_message', json={'message': message})
+        elif kind == 'chat':
+            response = client.get('/chat')
+        elif kind == 'chat_history':
+            response = client.get('/chat/history')
+        elif kind == 'admin_queries':
+            response = admin.get('/admin/queries')
+        elif kind == 'admin_add_query':
+            response = admin.post('/admin/add_query', json={
+                'question': f"Benchmark question {seed} {rng.random()}", 'answer': "Benchmark answer"})
+        elif kind == 'admin_update_query' and own_faqs:
+            response = admin.post(f'/admin/update_query/{own_faqs[-1]}', json={
+                'question': f"Benchmark question {seed} updated {rng.random()}", 'answer': "Updated"})
+        elif kind == 'admin_delete_query' and own_faqs:
+            response = admin.post(f'/admin/delete_query/{own_faqs.pop()}')
+        else:
+            continue
+        elapsed = time.perf_counter() - t0
+
+        ok = response.status_code == 200
+        if ok and response.is_json:
+            ok = response.get_json().get('status', 'success') == 'success'
+        recorder.add(kind, elapsed, ok)
+        if kind == 'admin_add_query' and ok:
+            own_faqs.append(response.get_json()['id'])
+
+
+def run_size(app_module, database, recorder, size, args, user_id):
+    seed_history(database, user_id, size)
+    app_module.chat_log.flush()
+    recorder.reset()
+
+    # Shared across workers so "novel" questions never repeat within a run
+    novel_counter = itertools.count(size * 10 ** 6)
+
+    per_worker = args.requests // args.concurrency
+    threads = [threading.Thread(target=run_worker,
+                                args=(app_module, recorder, user_id, per_worker,
+                                      args.seed * 1000 + worker, novel_counter))
+               for worker in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    app_module.chat_log.flush()
+
+    routes = {}
+    stages = {}
+    stage_names = {'faq_match', 'faq_retrieval', 'llm_cached_call', 'llm_upstream', 'fallback',
+                   'chat_log_enqueue', 'db_chat_page'}
+    for name, samples in recorder.samples.items():
+        target = stages if name in stage_names else routes
+        target[name] = summarize(samples, elapsed)
+        if target is routes:
+            target[name]['errors'] = recorder.errors.get(name, 0)
+    total = sum(len(s) for name, s in recorder.samples.items() if name not in stage_names)
+    return {
+        'history_size': size,
+        'elapsed_s': round(elapsed, 3),
+        'requests': total,
+        'throughput': round(total / elapsed, 2),
+        'routes': dict(sorted(routes.items())),
+        'stages': dict(sorted(stages.items())),
+    }
+
+
+def compare(previous, current, tolerance):
+    """Print p95 changes per route and return the number of regressions."""
+    regressions = 0
+    old_runs = {run['history_size']: run for run in previous['runs']}
+    for run in current['runs']:
+        old = old_runs.get(run['history_size'])
+        if old is None:
+            continue
+        print(f"\nhistory_size={run['history_size']}: throughput {old['throughput']} -> {run['throughput']} req/s")
+        for section in ('routes', 'stages'):
+            for name, stats in run[section].items():
+                before = old[section].get(name, {}).get('p95_ms')
+                after = stats['p95_ms']
+                if not before or after is None:
+                    continue
+                change = (after - before) / before * 100
+                flag = ''
+                if change > tolerance and after - before > 1:
+                    flag = '  REGRESSION'
+                    regressions += 1
+                print(f"  {name:28s} p95 {before:9.2f} -> {after:9.2f} ms ({change:+.1f}%){flag}")
+    return regressions
+
+
+def print_run(run):
+    print(f"\nhistory_size={run['history_size']}: {run['requests']} requests in {run['elapsed_s']}s "
+          f"({run['throughput']} req/s)")
+    for section in ('routes', 'stages'):
+        print(f"  {section}:")
+        for name, stats in run[section].items():
+            errors = f" errors={stats['errors']}" if stats.get('errors') else ''
+            print(f"    {name:28s} n={stats['count']:6d} p50={stats['p50_ms']:9.2f} "
+                  f"p95={stats['p95_ms']:9.2f} p99={stats['p99_ms']:9.2f} ms{errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='0,1000,10000', help='chat_history rows to seed per run')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per run')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='stub LLM latency in seconds')
+    parser.add_argument('--llm-jitter', type=float, default=0.05, help='extra random stub latency')
+    parser.add_argument('--llm-failure-rate', type=float, default=0.0, help='share of failing stub calls')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_results.json', help='machine-readable results file')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=20.0, help='allowed p95 increase in percent')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    from stub_llm import start_stub_server
+    stub = start_stub_server(latency=args.llm_latency, jitter=args.llm_jitter,
+                             failure_rate=args.llm_failure_rate)
+    workdir = tempfile.mkdtemp(prefix='chatbot-bench-')
+    os.environ['OPENAI_API_BASE'] = stub.api_base
+    os.environ['OPENAI_API_KEY'] = 'stub'
+    # Every worker thread runs as the same user, so per-user rate limiting is off
+    os.environ.setdefault('RATE_LIMIT_PER_MINUTE', '0')
+
+    # Point the app at a throwaway database before it is imported
+    from config import Config
+    Config.DATABASE = os.path.join(workdir, 'bench.db')
+    import app as app_module
+    import database
+
+    recorder = Recorder()
+    instrument_stages(app_module, recorder)
+
+    runs = []
+    for offset, size in enumerate(int(s) for s in args.sizes.split(',')):
+        user_id = 1000 + offset
+        run = run_size(app_module, database, recorder, size, args, user_id)
+        print_run(run)
+        runs.append(run)
+
+    results = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'settings': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'llm_latency': args.llm_latency,
+            'llm_jitter': args.llm_jitter,
+            'llm_failure_rate': args.llm_failure_rate,
+            'seed': args.seed,
+            'traffic_mix': dict(TRAFFIC_MIX),
+        },
+        'stub_completions': stub.completions,
+        'runs': runs,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        if compare(previous, results, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
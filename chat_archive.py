@@ -0,0 +1,46 @@
+"""Archival job that keeps the chat_history table small.
+
+Turns older than CHAT_ARCHIVE_AFTER_DAYS are moved, per user, into blocks
+of up to CHAT_ARCHIVE_BLOCK_SIZE messages in a separate SQLite file, each
+block stored as zlib-compressed JSON. get_chat_page and get_chat_history
+read the archive only when a user scrolls past what is left in
+chat_history, so the app needs no changes to serve archived turns.
+
+Run it periodically, e.g. from cron:
+
+    python chat_archive.py run
+
+It can be interrupted and re-run at any time. Note that
+"python analytics.py backfill" only sees turns still in chat_history.
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+
+from config import Config
+from database import archive_chat_block, archive_path, get_archivable_users, init_db
+
+
+def archive_chat_history(after_days=None, block_size=None):
+    """Move turns older than after_days into the archive, return the number of messages moved."""
+    after_days = Config.CHAT_ARCHIVE_AFTER_DAYS if after_days is None else after_days
+    block_size = block_size or Config.CHAT_ARCHIVE_BLOCK_SIZE
+    # Same format as the timestamps ChatLogWriter stores
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=after_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    moved = 0
+    for user_id in get_archivable_users(cutoff):
+        while True:
+            count = archive_chat_block(user_id, cutoff, block_size)
+            moved += count
+            if count < block_size:
+                break
+    return moved
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['run']:
+        print(__doc__)
+        sys.exit(1)
+    init_db()
+    moved = archive_chat_history()
+    print(f"Archived {moved} chat messages older than {Config.CHAT_ARCHIVE_AFTER_DAYS:g} days to {archive_path()}")
@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from database import add_chat_messages
+
+_STOP = object()
+
+
+class ChatLogWriter:
+    """Write-behind queue for chat_history inserts.
+
+    Request threads enqueue turns and return immediately; a single
+    background thread writes them with one executemany transaction per
+    batch, once batch_size rows are waiting or flush_interval seconds have
+    passed. The timestamp is taken at enqueue time so history order is not
+    affected by batching. When the queue is full, add() waits up to
+    put_timeout seconds and then writes the row itself, so turns are slowed
+    down rather than dropped.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=0.5, max_queue=10000, put_timeout=1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.overflows = 0
+        self._thread = threading.Thread(target=self._run, name='chat-log-writer', daemon=True)
+        self._thread.start()
+
+    def add(self, user_id, sender, message, timestamp=None):
+        """Queue a message and return the timestamp it is stored with."""
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        row = (user_id, sender, message, timestamp)
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.overflows += 1
+            self._write([row])
+        return timestamp
+
+    def flush(self):
+        """Write every row queued so far now and wait for it.
+
+        Rows added by other threads after the call are not waited for, so
+        this returns after at most one batch write even under load.
+        """
+        if self._queue.unfinished_tasks == 0 or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Write out everything still queued and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'written': self.written,
+                'batches': self.batches,
+                'overflows': self.overflows,
+            }
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                row = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                row = None
+
+            if row is _STOP:
+                self._write(batch)
+                self._done(len(batch) + 1)
+                return
+            if isinstance(row, threading.Event):
+                self._write(batch)
+                self._done(len(batch) + 1)
+                batch = []
+                deadline = None
+                row.set()
+                continue
+            if row is not None:
+                batch.append(row)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                self._done(len(batch))
+                batch = []
+                deadline = None
+
+    def _done(self, count):
+        for _ in range(count):
+            self._queue.task_done()
+
+    def _write(self, rows):
+        if not rows:
+            return
+        try:
+            add_chat_messages(rows)
+        except Exception as e:
+            print(f"Error writing chat history, retrying: {e}")
+            time.sleep(0.1)
+            try:
+                add_chat_messages(rows)
+            except Exception as e:
+                print(f"Dropped {len(rows)} chat history rows: {e}")
+                return
+        with self._lock:
+            self.written += len(rows)
+            self.batches += 1
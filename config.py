@@ -6,4 +6,60 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'bbc-college-secret-key-2023')
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    OPENAI_API_BASE = os.getenv('OPENAI_API_BASE')
     DATABASE = 'college_chatbot.db'
+    # SQLite tuning applied to every pooled connection (WAL mode is always on)
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+    DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 8192))
+    # Chat messages rendered on page load and fetched per scroll-back request
+    CHAT_PAGE_SIZE = int(os.getenv('CHAT_PAGE_SIZE', 50))
+    # Chat archival: archive file (default <DATABASE>_archive.db), age in days
+    # after which turns leave chat_history, and messages per compressed block
+    CHAT_ARCHIVE_DATABASE = os.getenv('CHAT_ARCHIVE_DATABASE')
+    CHAT_ARCHIVE_AFTER_DAYS = float(os.getenv('CHAT_ARCHIVE_AFTER_DAYS', 90))
+    CHAT_ARCHIVE_BLOCK_SIZE = int(os.getenv('CHAT_ARCHIVE_BLOCK_SIZE', 200))
+    INTENTS_FILE = os.getenv('INTENTS_FILE')
+    # TF-IDF FAQ retrieval: hashed vector size, minimum cosine similarity and
+    # minimum number of distinct informative terms (not in most FAQ questions)
+    # shared with the FAQ question
+    RETRIEVAL_DIM = int(os.getenv('RETRIEVAL_DIM', 1024))
+    RETRIEVAL_THRESHOLD = float(os.getenv('RETRIEVAL_THRESHOLD', 0.5))
+    RETRIEVAL_MIN_TERMS = int(os.getenv('RETRIEVAL_MIN_TERMS', 2))
+    # Memory-mapped FAQ snapshot shared by worker processes (off when unset)
+    # and how often, in seconds, a worker checks for FAQ edits made by others
+    KNOWLEDGE_SNAPSHOT = os.getenv('KNOWLEDGE_SNAPSHOT')
+    KNOWLEDGE_RELOAD_INTERVAL = float(os.getenv('KNOWLEDGE_RELOAD_INTERVAL', 1.0))
+    # LLM response cache: in-memory LRU entries and TTL in seconds
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 86400))
+    # OpenAI call budget: hard deadline and hedge delay in seconds (0 disables hedging)
+    LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 8))
+    LLM_HEDGE_AFTER = float(os.getenv('LLM_HEDGE_AFTER', 0))
+    LLM_WORKERS = int(os.getenv('LLM_WORKERS', 8))
+    # Circuit breaker: consecutive failures before opening, seconds before a probe
+    LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', 5))
+    LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', 30))
+    # Admission control: concurrent upstream calls, requests allowed to wait
+    # for a slot and for how many seconds before being answered by fallback
+    LLM_MAX_CONCURRENT = int(os.getenv('LLM_MAX_CONCURRENT', 8))
+    LLM_QUEUE_SIZE = int(os.getenv('LLM_QUEUE_SIZE', 16))
+    LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', 2))
+    # Per-user token bucket for LLM answers: sustained rate and burst (0 disables)
+    RATE_LIMIT_PER_MINUTE = float(os.getenv('RATE_LIMIT_PER_MINUTE', 20))
+    RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', 5))
+    # Write-behind chat logging: rows per transaction, max seconds a row waits,
+    # queue bound and how long add() waits on a full queue before writing inline
+    CHAT_LOG_BATCH_SIZE = int(os.getenv('CHAT_LOG_BATCH_SIZE', 100))
+    CHAT_LOG_FLUSH_INTERVAL = float(os.getenv('CHAT_LOG_FLUSH_INTERVAL', 0.5))
+    CHAT_LOG_QUEUE_SIZE = int(os.getenv('CHAT_LOG_QUEUE_SIZE', 10000))
+    CHAT_LOG_PUT_TIMEOUT = float(os.getenv('CHAT_LOG_PUT_TIMEOUT', 1.0))
+    # Conversation context for LLM prompts: recent messages kept verbatim,
+    # token cap for the summary of older turns and for the whole prompt, and
+    # how many recent messages are read from chat_history to build them
+    CONTEXT_WINDOW_MESSAGES = int(os.getenv('CONTEXT_WINDOW_MESSAGES', 6))
+    CONTEXT_SUMMARY_TOKENS = int(os.getenv('CONTEXT_SUMMARY_TOKENS', 200))
+    CONTEXT_HISTORY_MESSAGES = int(os.getenv('CONTEXT_HISTORY_MESSAGES', 40))
+    PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', 1200))
+    # Analytics rollups: seconds between writes and hours shown on the dashboard
+    ANALYTICS_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', 30))
+    ANALYTICS_HOURS = int(os.getenv('ANALYTICS_HOURS', 24))
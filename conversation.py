@@ -0,0 +1,125 @@
+import re
+import threading
+from collections import OrderedDict, deque
+
+from database import get_chat_page
+
+
+# Words that usually refer back to something said earlier
+FOLLOW_UP_RE = re.compile(r"\b(it|its|that|this|those|these|they|them|their|he|she|his|her|"
+                          r"also|same|else|above|previous|earlier|another)\b|^\s*(and|but|what about|how about)\b")
+
+
+def is_follow_up(message):
+    """Guess whether a message depends on the earlier conversation.
+
+    Standalone questions are answered without context so their LLM answers
+    can be shared through the response cache.
+    """
+    return bool(FOLLOW_UP_RE.search(message.lower()))
+
+
+def approx_tokens(text):
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+
+def clip(text, limit):
+    text = ' '.join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+
+class ConversationContext:
+    """Per-user conversation context for the LLM prompt, read from chat_history.
+
+    chat_history is shared by every worker process, so get() re-reads the
+    user's newest history_messages rows each time (one indexed query, made
+    only for follow-up questions). The last window_messages of them are the
+    window and the user's questions before that are the summary, trimmed to
+    summary_tokens. Prompt size does not grow with the conversation, and the
+    summary is extractive, so it costs no extra LLM call.
+
+    Turns this process recorded that the write-behind chat log has not
+    written yet are kept in memory and merged in by timestamp, so a quick
+    follow-up still sees the previous reply.
+    """
+
+    def __init__(self, window_messages=6, summary_tokens=200, history_messages=40, max_users=10000):
+        self.window_messages = window_messages
+        self.summary_tokens = summary_tokens
+        self.history_messages = max(history_messages, window_messages)
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+
+    def get(self, user_id):
+        """Return (summary, [(sender, message), ...]) for the user, oldest message first."""
+        rows, _ = get_chat_page(user_id, self.history_messages)
+        messages = [(row[0], row[1], row[2]) for row in rows]
+        stored = set(messages)
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending:
+                # Drop turns that have reached chat_history since they were recorded
+                written = [item for item in pending if item in stored]
+                for item in written:
+                    pending.remove(item)
+                messages.extend(pending)
+                if not pending:
+                    del self._pending[user_id]
+        # Stable sort keeps database order within a timestamp and unwritten turns after it
+        messages.sort(key=lambda item: item[2])
+
+        split = max(len(messages) - self.window_messages, 0)
+        summary = self._fold(messages[:split])
+        return summary, [(sender, message) for sender, message, _ in messages[split:]]
+
+    def record(self, user_id, user_message, ai_response, timestamp):
+        """Remember a finished turn until the chat log has written it.
+
+        timestamp must be the one the turn is stored with in chat_history,
+        which is how get() recognises it once it has been written.
+        """
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None:
+                pending = self._pending[user_id] = deque(maxlen=self.window_messages)
+            else:
+                self._pending.move_to_end(user_id)
+            pending.append(('user', user_message, timestamp))
+            pending.append(('ai', ai_response, timestamp))
+            while len(self._pending) > self.max_users:
+                self._pending.popitem(last=False)
+
+    def _fold(self, messages):
+        # Replies are derived from the questions, so only questions are kept
+        lines = [f"- {clip(message, 160)}" for sender, message, _ in messages if sender == 'user']
+        while lines and approx_tokens('\n'.join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        return '\n'.join(lines)
+
+
+def format_context(summary, window, budget):
+    """Render summary and recent turns for the prompt within budget tokens.
+
+    Recent turns are added newest first and the oldest are dropped when the
+    budget runs out; the summary goes in only if it still fits.
+    """
+    if budget <= 0:
+        return ''
+    turns = []
+    used = 0
+    for sender, message in reversed(window):
+        line = f"{'User' if sender == 'user' else 'Assistant'}: {clip(message, 600)}"
+        cost = approx_tokens(line)
+        if used + cost > budget:
+            break
+        turns.append(line)
+        used += cost
+
+    parts = []
+    if summary and used + approx_tokens(summary) <= budget:
+        parts.append("Earlier in this conversation the user asked about:\n" + summary)
+    if turns:
+        parts.append("Recent conversation:\n" + '\n'.join(reversed(turns)))
+    return '\n\n'.join(parts)
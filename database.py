@@ -1,9 +1,65 @@
+import json
+import os
 import sqlite3
+import threading
+import zlib
 from config import Config
+from metrics import timed_db
+
+# One connection per thread, reused across calls instead of reconnecting
+_local = threading.local()
 
 def get_db_connection():
-    conn = sqlite3.connect(Config.DATABASE)
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.database != Config.DATABASE:
+        # cached_statements keeps each thread's prepared statements around for reuse
+        conn = sqlite3.connect(Config.DATABASE, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={Config.DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size={-int(Config.DB_CACHE_SIZE_KB)}")
+        conn.execute("PRAGMA busy_timeout=5000")
+        _local.conn = conn
+        _local.database = Config.DATABASE
+    return conn
+
+def close_db_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+def archive_path():
+    return Config.CHAT_ARCHIVE_DATABASE or os.path.splitext(Config.DATABASE)[0] + '_archive.db'
+
+# Separate file for archived chat turns, so the main database and its
+# backups only carry recent history
+def get_archive_connection(create=False):
+    """Return this thread's archive connection, or None if there is no archive yet."""
+    path = archive_path()
+    conn = getattr(_local, 'archive_conn', None)
+    if conn is None or _local.archive_database != path:
+        if not create and not os.path.exists(path):
+            return None
+        conn = sqlite3.connect(path, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={Config.DB_SYNCHRONOUS}")
+        conn.execute("PRAGMA busy_timeout=5000")
+        # Each row is a zlib-compressed JSON list of one user's consecutive
+        # messages, [sender, message, timestamp, id] in chronological order
+        conn.execute('''CREATE TABLE IF NOT EXISTS chat_archive
+                        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER NOT NULL,
+                        first_timestamp DATETIME NOT NULL,
+                        first_id INTEGER NOT NULL,
+                        last_timestamp DATETIME NOT NULL,
+                        last_id INTEGER NOT NULL,
+                        count INTEGER NOT NULL,
+                        messages BLOB NOT NULL)''')
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_chat_archive_user_time
+                        ON chat_archive (user_id, last_timestamp, last_id)''')
+        _local.archive_conn = conn
+        _local.archive_database = path
     return conn
 
 def init_db():
@@ -26,6 +82,8 @@ def init_db():
                  message TEXT NOT NULL,
                  timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                  FOREIGN KEY (user_id) REFERENCES users (id))''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_chat_history_user_time
+                 ON chat_history (user_id, timestamp, id)''')
     
     # FAQ table for predefined questions and answers
     c.execute('''CREATE TABLE IF NOT EXISTS faqs
@@ -33,6 +91,28 @@ def init_db():
                  question TEXT NOT NULL,
                  answer TEXT NOT NULL)''')
     
+    # Analytics rollups, maintained incrementally instead of scanning chat_history
+    c.execute('''CREATE TABLE IF NOT EXISTS analytics_counts
+                 (metric TEXT NOT NULL,
+                 key TEXT NOT NULL,
+                 count INTEGER NOT NULL DEFAULT 0,
+                 PRIMARY KEY (metric, key))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS analytics_hourly
+                 (hour TEXT PRIMARY KEY,
+                 messages INTEGER NOT NULL DEFAULT 0,
+                 unanswered INTEGER NOT NULL DEFAULT 0)''')
+    
+    # Persistent tier of the LLM response cache, keyed by normalized question
+    c.execute('''CREATE TABLE IF NOT EXISTS response_cache
+                 (key TEXT PRIMARY KEY,
+                 response TEXT NOT NULL,
+                 created_at REAL NOT NULL)''')
+
+    # Version counters, e.g. of the FAQ knowledge snapshot
+    c.execute('''CREATE TABLE IF NOT EXISTS knowledge_meta
+                 (name TEXT PRIMARY KEY,
+                 value INTEGER NOT NULL)''')
+    
     # Check if admin user exists, if not create one
     c.execute("SELECT * FROM users WHERE username=?", ('admin',))
     admin = c.fetchone()
@@ -58,79 +138,269 @@ def init_db():
         c.executemany("INSERT INTO faqs (question, answer) VALUES (?, ?)", sample_faqs)
     
     conn.commit()
-    conn.close()
 
+@timed_db
 def add_user(username, email, password):
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("INSERT INTO users (username, email, password) VALUES (?, ?, ?)", 
-                 (username, email, password))
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            conn.execute("INSERT INTO users (username, email, password) VALUES (?, ?, ?)", 
+                         (username, email, password))
         return True
     except sqlite3.IntegrityError:
         return False
 
+@timed_db
 def get_user(username):
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE username=?", (username,))
-    user = c.fetchone()
-    conn.close()
-    return user
+    return conn.execute("SELECT * FROM users WHERE username=?", (username,)).fetchone()
 
+@timed_db
 def add_chat_message(user_id, sender, message):
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("INSERT INTO chat_history (user_id, sender, message) VALUES (?, ?, ?)", 
-             (user_id, sender, message))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute("INSERT INTO chat_history (user_id, sender, message) VALUES (?, ?, ?)", 
+                     (user_id, sender, message))
 
+@timed_db
+def add_chat_messages(rows):
+    """Insert (user_id, sender, message, timestamp) rows in one transaction."""
+    with get_db_connection() as conn:
+        conn.executemany("INSERT INTO chat_history (user_id, sender, message, timestamp) VALUES (?, ?, ?, ?)", 
+                         rows)
+
+@timed_db
 def get_chat_history(user_id):
+    """Return every (sender, message, timestamp) row of the user, archived ones first."""
+    rows = []
+    archive = get_archive_connection()
+    if archive is not None:
+        for (blob,) in archive.execute("SELECT messages FROM chat_archive WHERE user_id=? "
+                                       "ORDER BY last_timestamp, last_id", (user_id,)):
+            rows.extend((sender, message, timestamp) for sender, message, timestamp, _ in _unpack_block(blob))
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT sender, message, timestamp FROM chat_history WHERE user_id=? ORDER BY timestamp", (user_id,))
-    history = c.fetchall()
-    conn.close()
-    return history
+    rows.extend(conn.execute("SELECT sender, message, timestamp FROM chat_history WHERE user_id=? ORDER BY timestamp, id", (user_id,)).fetchall())
+    return rows
+
+@timed_db
+def get_chat_page(user_id, limit, before=None):
+    """Return up to limit messages older than the before=(timestamp, id) cursor.
+
+    Rows are (sender, message, timestamp, id) in chronological order, plus a
+    flag telling whether older messages exist. Uses keyset pagination on
+    the (user_id, timestamp, id) index, so cost does not grow with history
+    length. The archive is only read once the page runs past the oldest
+    message still in chat_history.
+    """
+    conn = get_db_connection()
+    if before is None:
+        rows = conn.execute("SELECT sender, message, timestamp, id FROM chat_history WHERE user_id=? "
+                            "ORDER BY timestamp DESC, id DESC LIMIT ?", (user_id, limit + 1)).fetchall()
+    else:
+        rows = conn.execute("SELECT sender, message, timestamp, id FROM chat_history WHERE user_id=? "
+                            "AND (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT ?",
+                            (user_id, before[0], before[1], limit + 1)).fetchall()
+    if len(rows) > limit:
+        return rows[:limit][::-1], True
+
+    if rows:
+        before = (rows[-1][2], rows[-1][3])
+    archived, has_more = _get_archived_page(user_id, limit - len(rows), before)
+    return archived + rows[::-1], has_more
+
+def _get_archived_page(user_id, limit, before=None):
+    """get_chat_page over the archive: decompresses only the blocks the page touches."""
+    archive = get_archive_connection()
+    if archive is None:
+        return [], False
+    if before is None:
+        blocks = archive.execute("SELECT messages FROM chat_archive WHERE user_id=? "
+                                 "ORDER BY last_timestamp DESC, last_id DESC", (user_id,))
+    else:
+        # Blocks never overlap, so any block starting before the cursor holds older messages
+        blocks = archive.execute("SELECT messages FROM chat_archive WHERE user_id=? "
+                                 "AND (first_timestamp, first_id) < (?, ?) "
+                                 "ORDER BY last_timestamp DESC, last_id DESC", (user_id, before[0], before[1]))
+    rows = []
+    for (blob,) in blocks:
+        for row in reversed(_unpack_block(blob)):
+            if before is not None and (row[2], row[3]) >= tuple(before):
+                continue
+            if len(rows) == limit:
+                return rows[::-1], True
+            rows.append(row)
+    return rows[::-1], False
+
+@timed_db
+def get_archivable_users(cutoff):
+    """Return ids of users with chat_history rows older than cutoff."""
+    conn = get_db_connection()
+    return [row[0] for row in conn.execute("SELECT DISTINCT user_id FROM chat_history WHERE timestamp < ?", (cutoff,))]
+
+@timed_db
+def archive_chat_block(user_id, cutoff, block_size):
+    """Move up to block_size of the user's messages older than cutoff into one archive block.
+
+    Returns the number of messages moved. The archive insert commits before
+    the chat_history delete; if the delete is lost, the next call removes
+    the already archived rows before archiving anything new.
+    """
+    archive = get_archive_connection(create=True)
+    conn = get_db_connection()
+    last = archive.execute("SELECT last_timestamp, last_id FROM chat_archive WHERE user_id=? "
+                           "ORDER BY last_timestamp DESC, last_id DESC LIMIT 1", (user_id,)).fetchone()
+    if last is not None:
+        with conn:
+            conn.execute("DELETE FROM chat_history WHERE user_id=? AND (timestamp, id) <= (?, ?)",
+                         (user_id, last[0], last[1]))
+
+    rows = conn.execute("SELECT sender, message, timestamp, id FROM chat_history WHERE user_id=? "
+                        "AND timestamp < ? ORDER BY timestamp, id LIMIT ?", (user_id, cutoff, block_size)).fetchall()
+    if not rows:
+        return 0
+    blob = zlib.compress(json.dumps([list(row) for row in rows]).encode('utf-8'))
+    with archive:
+        archive.execute("INSERT INTO chat_archive (user_id, first_timestamp, first_id, last_timestamp, last_id, "
+                        "count, messages) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (user_id, rows[0][2], rows[0][3], rows[-1][2], rows[-1][3], len(rows), blob))
+    with conn:
+        conn.execute("DELETE FROM chat_history WHERE user_id=? AND (timestamp, id) <= (?, ?)",
+                     (user_id, rows[-1][2], rows[-1][3]))
+    return len(rows)
 
+def _unpack_block(blob):
+    return [tuple(row) for row in json.loads(zlib.decompress(blob))]
+
+@timed_db
 def add_faq(question, answer):
+    with get_db_connection() as conn:
+        c = conn.execute("INSERT INTO faqs (question, answer) VALUES (?, ?)", 
+                         (question, answer))
+    return c.lastrowid
+
+@timed_db
+def import_faqs(rows, chunk_size=500, counts=None):
+    """Insert (question, answer) pairs from an iterable in chunked transactions.
+
+    Questions already in the table, or repeated in rows, are skipped,
+    compared case-insensitively. Returns (added, skipped). If given, the
+    counts dict is kept up to date as chunks commit, so a caller still
+    knows what was added when rows raises part way through.
+    """
+    if counts is None:
+        counts = {}
+    counts['added'] = counts['skipped'] = 0
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("INSERT INTO faqs (question, answer) VALUES (?, ?)", 
-             (question, answer))
-    conn.commit()
-    conn.close()
+    seen = {row[0].strip().lower() for row in conn.execute("SELECT question FROM faqs")}
+    chunk = []
+    for question, answer in rows:
+        question, answer = question.strip(), answer.strip()
+        key = question.lower()
+        if not question or not answer or key in seen:
+            counts['skipped'] += 1
+            continue
+        seen.add(key)
+        chunk.append((question, answer))
+        if len(chunk) >= chunk_size:
+            with conn:
+                conn.executemany("INSERT INTO faqs (question, answer) VALUES (?, ?)", chunk)
+            counts['added'] += len(chunk)
+            chunk = []
+    if chunk:
+        with conn:
+            conn.executemany("INSERT INTO faqs (question, answer) VALUES (?, ?)", chunk)
+        counts['added'] += len(chunk)
+    return counts['added'], counts['skipped']
+
+def iter_faqs():
+    """Yield every FAQ row in id order without loading the table into memory."""
+    conn = get_db_connection()
+    yield from conn.execute("SELECT id, question, answer FROM faqs ORDER BY id")
 
+@timed_db
 def get_faqs():
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT * FROM faqs ORDER BY id")
-    faqs = c.fetchall()
-    conn.close()
-    return faqs
+    return conn.execute("SELECT * FROM faqs ORDER BY id").fetchall()
 
+@timed_db
 def get_faq(faq_id):
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT * FROM faqs WHERE id=?", (faq_id,))
-    faq = c.fetchone()
-    conn.close()
-    return faq
+    return conn.execute("SELECT * FROM faqs WHERE id=?", (faq_id,)).fetchone()
 
+@timed_db
 def update_faq(faq_id, question, answer):
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("UPDATE faqs SET question=?, answer=? WHERE id=?", 
-             (question, answer, faq_id))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute("UPDATE faqs SET question=?, answer=? WHERE id=?", 
+                     (question, answer, faq_id))
 
+@timed_db
 def delete_faq(faq_id):
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM faqs WHERE id=?", (faq_id,))
+
+@timed_db
+def get_cached_response(key):
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("DELETE FROM faqs WHERE id=?", (faq_id,))
-    conn.commit()
-    conn.close()
+    return conn.execute("SELECT response, created_at FROM response_cache WHERE key=?", (key,)).fetchone()
+
+@timed_db
+def set_cached_response(key, response, created_at):
+    with get_db_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO response_cache (key, response, created_at) VALUES (?, ?, ?)", 
+                     (key, response, created_at))
+
+@timed_db
+def delete_cached_response(key):
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM response_cache WHERE key=?", (key,))
+
+@timed_db
+def clear_response_cache():
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM response_cache")
+
+@timed_db
+def add_analytics(counts, hourly):
+    """Add (metric, key, count) and (hour, messages, unanswered) deltas in one transaction."""
+    with get_db_connection() as conn:
+        conn.executemany("INSERT INTO analytics_counts (metric, key, count) VALUES (?, ?, ?) "
+                         "ON CONFLICT (metric, key) DO UPDATE SET count = count + excluded.count", counts)
+        conn.executemany("INSERT INTO analytics_hourly (hour, messages, unanswered) VALUES (?, ?, ?) "
+                         "ON CONFLICT (hour) DO UPDATE SET messages = messages + excluded.messages, "
+                         "unanswered = unanswered + excluded.unanswered", hourly)
+
+@timed_db
+def get_analytics(hours):
+    """Return ({metric: {key: count}}, {hour: [messages, unanswered]}) for the last hours rows."""
+    conn = get_db_connection()
+    counts = {}
+    for metric, key, count in conn.execute("SELECT metric, key, count FROM analytics_counts"):
+        counts.setdefault(metric, {})[key] = count
+    hourly = {row[0]: [row[1], row[2]] for row in conn.execute(
+        "SELECT hour, messages, unanswered FROM analytics_hourly ORDER BY hour DESC LIMIT ?", (hours,))}
+    return counts, hourly
+
+@timed_db
+def clear_analytics():
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM analytics_counts")
+        conn.execute("DELETE FROM analytics_hourly")
+
+@timed_db
+def get_chat_history_after(after_id, limit):
+    """Return up to limit chat_history rows with id > after_id, in id order."""
+    conn = get_db_connection()
+    return conn.execute("SELECT id, user_id, sender, message, timestamp FROM chat_history "
+                        "WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)).fetchall()
+
+@timed_db
+def get_knowledge_version():
+    conn = get_db_connection()
+    row = conn.execute("SELECT value FROM knowledge_meta WHERE name='faqs'").fetchone()
+    return row[0] if row else 0
+
+@timed_db
+def bump_knowledge_version():
+    """Increment and return the FAQ knowledge version."""
+    with get_db_connection() as conn:
+        conn.execute("INSERT INTO knowledge_meta (name, value) VALUES ('faqs', 1) "
+                     "ON CONFLICT (name) DO UPDATE SET value = value + 1")
+        return conn.execute("SELECT value FROM knowledge_meta WHERE name='faqs'").fetchone()[0]
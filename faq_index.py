@@ -0,0 +1,125 @@
+import threading
+from collections import deque
+
+
+class FAQIndex:
+    """In-memory Aho-Corasick automaton over the FAQ questions.
+
+    A message matches an FAQ when the whole (lowercased) question appears
+    inside the (lowercased) message, same as the old linear scan over
+    get_faqs(). The automaton finds every such question in one pass over the
+    message, so lookup cost depends on the message length and not on how
+    many FAQs are stored. The automaton is rebuilt when the FAQs change,
+    by the admin request making the change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._faqs = {}
+        self._version = 0
+        self._automaton = _compile({})
+
+    def load(self, faqs):
+        """Replace the index contents with rows from get_faqs()."""
+        with self._lock:
+            self._faqs = {faq[0]: (faq[1], faq[2]) for faq in faqs}
+        self._rebuild()
+
+    def add(self, faq_id, question, answer):
+        with self._lock:
+            self._faqs[faq_id] = (question, answer)
+        self._rebuild()
+
+    def update(self, faq_id, question, answer):
+        self.add(faq_id, question, answer)
+
+    def remove(self, faq_id):
+        with self._lock:
+            self._faqs.pop(faq_id, None)
+        self._rebuild()
+
+    def __len__(self):
+        return len(self._faqs)
+
+    def match(self, message):
+        """Return the answer of the lowest-id FAQ found in the message, or None."""
+        goto, fail, output, answers = self._automaton
+        best = None
+        state = 0
+        for ch in message.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state] is not None and (best is None or output[state] < best):
+                best = output[state]
+        return answers[best] if best is not None else None
+
+    def export_automaton(self):
+        """Return the automaton as flat lists for knowledge_snapshot.
+
+        (edge_start, edge_chars, edge_targets, fail, output): the edges of
+        state s are edge_chars/edge_targets[edge_start[s]:edge_start[s + 1]],
+        sorted by character code, and output[s] is the FAQ id ending at s or -1.
+        """
+        goto, fail, output, _ = self._automaton
+        edge_start, edge_chars, edge_targets = [0], [], []
+        for edges in goto:
+            for ch, target in sorted(edges.items()):
+                edge_chars.append(ord(ch))
+                edge_targets.append(target)
+            edge_start.append(len(edge_chars))
+        return edge_start, edge_chars, edge_targets, list(fail), [-1 if o is None else o for o in output]
+
+    def _rebuild(self):
+        # Edits build the new automaton up front, outside the lock, and swap
+        # it in, so match() never builds and never waits for an edit. When
+        # edits overlap only the build of the latest one is kept
+        with self._lock:
+            self._version += 1
+            version = self._version
+            faqs = dict(self._faqs)
+        automaton = _compile(faqs)
+        with self._lock:
+            if version == self._version:
+                self._automaton = automaton
+
+
+def _compile(faqs):
+    """Build (goto, fail, output, answers) for {faq_id: (question, answer)}."""
+    goto = [{}]
+    # output[state] holds the lowest FAQ id ending at this state,
+    # including ids inherited through failure links
+    output = [None]
+    answers = {}
+    for faq_id, (question, answer) in faqs.items():
+        pattern = question.lower()
+        if not pattern:
+            continue
+        state = 0
+        for ch in pattern:
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[state][ch] = nxt
+                goto.append({})
+                output.append(None)
+            state = nxt
+        if output[state] is None or faq_id < output[state]:
+            output[state] = faq_id
+        answers[faq_id] = answer
+
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for ch, nxt in goto[state].items():
+            queue.append(nxt)
+            f = fail[state]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            inherited = output[fail[nxt]]
+            if inherited is not None and (output[nxt] is None or inherited < output[nxt]):
+                output[nxt] = inherited
+
+    return goto, fail, output, answers
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+
+
+def faq_format(filename, default='csv'):
+    """Return 'csv' or 'jsonl' from a file name's extension."""
+    name = (filename or '').lower()
+    if name.endswith('.jsonl') or name.endswith('.json'):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_faq_rows(stream, fmt):
+    """Yield (question, answer) pairs from a binary stream without reading it all.
+
+    CSV files use "question" and "answer" header columns, or the first two
+    columns when there is no such header; rows missing a column are
+    yielded blank so they count as skipped. JSONL lines are objects with
+    "question" and "answer" string fields. Malformed input raises ValueError.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'jsonl':
+        for number, line in enumerate(text, start=1):
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                if not isinstance(item, dict):
+                    raise ValueError(f"line {number} is not a JSON object")
+                question, answer = item['question'], item['answer']
+                if not isinstance(question, str) or not isinstance(answer, str):
+                    raise ValueError(f"line {number}: question and answer must be strings")
+                yield question, answer
+        return
+
+    reader = csv.reader(text)
+    try:
+        yield from _csv_rows(reader)
+    except csv.Error as e:
+        raise ValueError(f"line {reader.line_num}: {e}") from e
+
+
+def _csv_rows(reader):
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [name.strip().lower() for name in first]
+    if 'question' in header and 'answer' in header:
+        q_column, a_column = header.index('question'), header.index('answer')
+    else:
+        q_column, a_column = 0, 1
+        if first:
+            yield _columns(first, q_column, a_column)
+    for row in reader:
+        if row:
+            yield _columns(row, q_column, a_column)
+
+
+def _columns(row, q_column, a_column):
+    question = row[q_column] if len(row) > q_column else ''
+    answer = row[a_column] if len(row) > a_column else ''
+    return question, answer
+
+
+def write_faq_rows(rows, fmt):
+    """Yield the export file for (id, question, answer) rows in chunks of text."""
+    if fmt == 'jsonl':
+        for row in rows:
+            yield json.dumps({'id': row[0], 'question': row[1], 'answer': row[2]}) + '\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['id', 'question', 'answer'])
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([row[0], row[1], row[2]])
+        if count % 500 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
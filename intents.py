@@ -0,0 +1,155 @@
+import json
+import re
+
+# Fallback answer categories, checked in this order when scores tie. Weak
+# triggers are generic words that only hint at a category ("when", "where")
+WEAK_TRIGGER_WEIGHT = 0.25
+
+INTENTS = [
+    {
+        'name': 'admission',
+        'triggers': ['admission', 'admissions', 'admit', 'admitted', 'apply', 'applied', 'applying', 'application', 'applications',
+                     'enroll', 'enrol', 'enrolled', 'enrolling', 'enrollment'],
+        'response': "BBC College offers admissions to various undergraduate and postgraduate programs. The admission process typically begins in May each year. You'll need to submit your academic transcripts, identification documents, and complete the application form available on our website or at the admission office."
+    },
+    {
+        'name': 'courses',
+        'triggers': ['course', 'courses', 'program', 'programs', 'programme', 'programmes', 'degree', 'degrees', 'study', 'studies',
+                     'studying', 'major', 'majors', 'curriculum', 'bachelor', 'bachelors', 'master', 'masters', 'bba', 'bca', 'mba'],
+        'response': "BBC College offers a wide range of programs including:\n\n- BBA (Bachelor of Business Administration)\n- BCA (Bachelor of Computer Applications)\n- MBA (Master of Business Administration)\n- Various other undergraduate and postgraduate programs\n\nVisit our website https://bbc.edu.in/ for detailed information about each program."
+    },
+    {
+        'name': 'fees',
+        'triggers': ['fee', 'fees', 'cost', 'costs', 'tuition', 'price', 'prices', 'payment', 'payments', 'financial', 'scholarship',
+                     'scholarships'],
+        'response': "The fee structure varies by program at BBC College. For detailed information about tuition fees, payment schedules, and scholarship opportunities, please contact our admission office at +91-XXXXXXXXXX or visit our campus. We offer various scholarship programs for deserving students."
+    },
+    {
+        'name': 'contact',
+        'triggers': ['contact', 'contacting', 'email', 'phone', 'address', 'location', 'located'],
+        'weak_triggers': ['where', 'visit', 'visiting'],
+        'response': "You can contact BBC College at:\n\nAddress: BBC Educational Campus, [City/Area], [State], India\nPhone: +91-XXXXXXXXXX\nEmail: info@bbc.edu.in\nWebsite: https://bbc.edu.in/\n\nVisit our website for more contact details and location information."
+    },
+    {
+        'name': 'facility',
+        'triggers': ['facility', 'facilities', 'library', 'libraries', 'lab', 'labs', 'laboratory', 'laboratories', 'hostel', 'hostels',
+                     'accommodation', 'sport', 'sports', 'canteen'],
+        'response': "BBC College provides excellent facilities including:\n- Well-equipped library with extensive resources\n- Modern computer labs with latest technology\n- Science laboratories for practical learning\n- Hostel accommodation for outstation students\n- Sports facilities and playground\n- Cafeteria serving hygienic food\n\nVisit our campus to see these facilities firsthand."
+    },
+    {
+        'name': 'placement',
+        'triggers': ['placement', 'placements', 'placed', 'job', 'jobs', 'career', 'careers', 'internship', 'internships', 'company',
+                     'companies', 'recruitment', 'recruiters'],
+        'response': "BBC College has a dedicated placement cell that works with various industries to provide placement opportunities for our students. We have a good track record of placements in reputed companies. The placement cell also organizes training programs, workshops, and pre-placement talks to prepare students for their careers."
+    },
+    {
+        'name': 'about',
+        'triggers': ['history', 'establish', 'established', 'founded', 'vision', 'mission'],
+        'weak_triggers': ['about', 'found'],
+        'response': "BBC College is a premier educational institution committed to providing quality education. We focus on holistic development of students through academic excellence, extracurricular activities, and value-based education. Our vision is to create responsible citizens and future leaders through innovative teaching methods and practical learning experiences."
+    },
+    {
+        'name': 'greeting',
+        'triggers': ['hi', 'hello', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening'],
+        'response': "Hello! Welcome to BBC College enquiry chatbot. How can I assist you with information about our college today?"
+    },
+    {
+        'name': 'thanks',
+        'triggers': ['thank', 'thanks', 'thanked', 'appreciate', 'appreciated', 'grateful'],
+        'response': "You're welcome! Is there anything else you'd like to know about BBC College? Feel free to ask any questions about admissions, courses, facilities, or any other aspect of our college."
+    },
+    {
+        'name': 'goodbye',
+        'triggers': ['bye', 'goodbye', 'see you', 'farewell', 'exit', 'quit'],
+        'response': "Thank you for contacting BBC College. Have a great day! If you have more questions later, feel free to chat with us again. You can also visit our website https://bbc.edu.in/ for more information."
+    },
+    {
+        'name': 'website',
+        'triggers': ['website', 'online', 'portal', 'web', 'internet'],
+        'response': "Our official website is https://bbc.edu.in/. You can find detailed information about all our programs, admission procedures, faculty, facilities, and much more on our website. You can also contact us through the website for specific queries."
+    },
+    {
+        'name': 'faculty',
+        'triggers': ['faculty', 'faculties', 'professor', 'professors', 'teacher', 'teachers', 'instructor', 'instructors', 'lecturer',
+                     'lecturers', 'staff'],
+        'response': "BBC College has highly qualified and experienced faculty members who are dedicated to providing quality education. Our teachers are experts in their respective fields and use innovative teaching methods to ensure effective learning. Many of our faculty members have industry experience and advanced degrees."
+    },
+    {
+        'name': 'timing',
+        'triggers': ['timing', 'timings', 'hour', 'hours', 'schedule', 'schedules'],
+        'weak_triggers': ['time', 'times', 'when', 'open', 'opens', 'close', 'closes'],
+        'response': "The college timing is typically from 9:00 AM to 4:00 PM, Monday to Friday. However, specific timings may vary for different programs and departments. The administrative office is open from 9:00 AM to 5:00 PM on working days. Please contact the college for specific schedule information."
+    }
+]
+
+DEFAULT_RESPONSE = "I'm not sure I understand your question about BBC College. Could you please rephrase it? I can help with information about admissions, courses, fees, facilities, placements, faculty, and other aspects of our college. You can also visit our website https://bbc.edu.in/ for detailed information."
+
+
+class IntentEngine:
+    """Keyword intent matcher compiled once into a single regex.
+
+    Triggers only match whole words, so "hi" no longer fires inside "this"
+    or "his" and "lab" no longer fires inside "available"; inflected forms
+    ("fees", "applied") are listed as triggers of their own. Every category is
+    scored in one pass over the message by its distinct triggers, each weak
+    trigger counting WEAK_TRIGGER_WEIGHT, so "when do admissions open" is
+    about admission rather than timing. The highest score wins; ties go to
+    the category listed first.
+    """
+
+    def __init__(self, intents, default_response=DEFAULT_RESPONSE):
+        self.intents = list(intents)
+        self.default_response = default_response
+        self.responses = {intent['response'] for intent in self.intents}
+        self._trigger_intent = {}
+        for position, intent in enumerate(self.intents):
+            for trigger in intent['triggers']:
+                self._trigger_intent.setdefault(trigger.lower(), (position, 1.0))
+            for trigger in intent.get('weak_triggers', ()):
+                self._trigger_intent.setdefault(trigger.lower(), (position, WEAK_TRIGGER_WEIGHT))
+
+        # Longest first so "good morning" wins over a shorter overlapping trigger
+        triggers = sorted(self._trigger_intent, key=len, reverse=True)
+        if triggers:
+            alternation = '|'.join(re.escape(t) for t in triggers)
+            self._pattern = re.compile(r'\b(' + alternation + r')\b')
+        else:
+            self._pattern = None
+
+    def classify(self, message):
+        """Return the name of the best matching intent, or None."""
+        position = self._best(message)
+        return self.intents[position]['name'] if position is not None else None
+
+    def respond(self, message):
+        position = self._best(message)
+        if position is None:
+            return self.default_response
+        return self.intents[position]['response']
+
+    def _best(self, message):
+        if self._pattern is None:
+            return None
+        matched = {}
+        for match in self._pattern.finditer(message.lower()):
+            trigger = match.group(1)
+            matched.setdefault(self._trigger_intent[trigger][0], set()).add(trigger)
+        if not matched:
+            return None
+        scores = {position: sum(self._trigger_intent[trigger][1] for trigger in triggers)
+                  for position, triggers in matched.items()}
+        return min(scores, key=lambda position: (-scores[position], position))
+
+
+def load_intents(path):
+    """Load intents from a JSON file.
+
+    The file is either a list of {"name", "triggers", "response"} objects,
+    each with optional "weak_triggers", or
+    an object with "intents" and an optional "default_response".
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return IntentEngine(data)
+    return IntentEngine(data['intents'], data.get('default_response', DEFAULT_RESPONSE))
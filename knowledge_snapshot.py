@@ -0,0 +1,307 @@
+"""Compiled, memory-mapped FAQ knowledge shared by all worker processes.
+
+The snapshot file holds everything FAQ matching needs: FAQ ids, questions
+and answers as one UTF-8 blob, the flattened Aho-Corasick automaton from
+FAQIndex, and the IDF-weighted TF-IDF matrix from FAQRetriever. Workers
+mmap it and read the arrays in place, so the OS page cache keeps one copy
+for every process and a worker starts without reading the faqs table.
+
+An admin edit rebuilds the file from SQLite under a file lock, bumps the
+version kept in the knowledge_meta table, writes a temporary file and
+renames it over the old one. Other workers notice the new file within
+reload_interval seconds and switch to it; lookups that are already running
+keep using the old mapping.
+
+After changing the faqs table outside the app, rebuild the snapshot with:
+
+    python knowledge_snapshot.py build
+"""
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from faq_index import FAQIndex
+from retrieval import FAQRetriever, top_matches
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent rebuilds are not serialised
+    fcntl = None
+
+MAGIC = b'CKSNAP01'
+ALIGN = 8
+
+
+def write_snapshot(path, faqs, version, dim):
+    """Compile faqs (rows from get_faqs()) into a snapshot file at path, atomically."""
+    # Row order is id order so Snapshot can find an FAQ's row by bisecting ids
+    faqs = sorted(faqs, key=lambda faq: faq[0])
+    index = FAQIndex()
+    index.load(faqs)
+    edge_start, edge_chars, edge_targets, fail, output = index.export_automaton()
+    retriever = FAQRetriever(dim)
+    retriever.load(faqs)
+    weighted, idf, ids = retriever.export_matrix()
+
+    question_blob, question_offsets = _text_blob(faq[1] for faq in faqs)
+    answer_blob, answer_offsets = _text_blob(faq[2] for faq in faqs)
+    sections = {
+        'ids': np.asarray(ids, dtype=np.int64),
+        'question_offsets': question_offsets,
+        'questions': question_blob,
+        'answer_offsets': answer_offsets,
+        'answers': answer_blob,
+        'edge_start': np.asarray(edge_start, dtype=np.int32),
+        'edge_chars': np.asarray(edge_chars, dtype=np.int32),
+        'edge_targets': np.asarray(edge_targets, dtype=np.int32),
+        'fail': np.asarray(fail, dtype=np.int32),
+        'output': np.asarray(output, dtype=np.int64),
+        'weighted': np.ascontiguousarray(weighted, dtype=np.float32),
+        'idf': np.asarray(idf, dtype=np.float32),
+    }
+
+    layout = {}
+    offset = 0
+    for name, array in sections.items():
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset += _aligned(array.nbytes)
+    header = json.dumps({'version': version, 'dim': dim, 'sections': layout}).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for name, array in sections.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _text_blob(texts):
+    offsets = [0]
+    chunks = []
+    for text in texts:
+        data = text.encode('utf-8')
+        chunks.append(data)
+        offsets.append(offsets[-1] + len(data))
+    return np.frombuffer(b''.join(chunks), dtype=np.uint8), np.asarray(offsets, dtype=np.int64)
+
+
+def _aligned(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+class Snapshot:
+    """One mapped snapshot file; read-only and safe to share between threads."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a knowledge snapshot")
+        (header_len,) = struct.unpack_from('<Q', self._mm, len(MAGIC))
+        header = json.loads(self._mm[len(MAGIC) + 8:len(MAGIC) + 8 + header_len])
+        self.version = header['version']
+        self.dim = header['dim']
+        data_start = _aligned(len(MAGIC) + 8 + header_len)
+
+        view = memoryview(self._mm)
+        arrays = {}
+        for name, section in header['sections'].items():
+            dtype = np.dtype(section['dtype'])
+            count = int(np.prod(section['shape'])) if section['shape'] else 0
+            arrays[name] = np.frombuffer(self._mm, dtype=dtype, count=count,
+                                         offset=data_start + section['offset']).reshape(section['shape'])
+        self.ids = arrays['ids']
+        self.weighted = arrays['weighted']
+        self.idf = arrays['idf']
+        # Plain memoryviews for the automaton: indexing them from Python is
+        # much cheaper than indexing NumPy arrays element by element
+        self._edge_start = _cast(view, header, data_start, 'edge_start', 'i')
+        self._edge_chars = _cast(view, header, data_start, 'edge_chars', 'i')
+        self._edge_targets = _cast(view, header, data_start, 'edge_targets', 'i')
+        self._fail = _cast(view, header, data_start, 'fail', 'i')
+        self._output = _cast(view, header, data_start, 'output', 'q')
+        self._question_offsets = _cast(view, header, data_start, 'question_offsets', 'q')
+        self._answer_offsets = _cast(view, header, data_start, 'answer_offsets', 'q')
+        self._questions = _cast(view, header, data_start, 'questions', 'B')
+        self._answers = _cast(view, header, data_start, 'answers', 'B')
+        # Most characters are looked up from the root, so its edges (at most
+        # one per distinct first character) are copied into a dict
+        root_end = self._edge_start[1] if len(self._fail) else 0
+        self._root = dict(zip(self._edge_chars[:root_end], self._edge_targets[:root_end]))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def match(self, message):
+        """Same result as FAQIndex.match, walking the mapped automaton."""
+        edge_start, edge_chars, edge_targets = self._edge_start, self._edge_chars, self._edge_targets
+        fail, output, root = self._fail, self._output, self._root
+        bisect_left = bisect.bisect_left
+        best = -1
+        state = 0
+        for ch in message.lower():
+            code = ord(ch)
+            while state:
+                lo, hi = edge_start[state], edge_start[state + 1]
+                i = bisect_left(edge_chars, code, lo, hi)
+                if i < hi and edge_chars[i] == code:
+                    state = edge_targets[i]
+                    break
+                state = fail[state]
+            else:
+                state = root.get(code, 0)
+            found = output[state]
+            if found != -1 and (best == -1 or found < best):
+                best = found
+        if best == -1:
+            return None
+        return self.answer(self._row(best))
+
+    def search(self, message, k=3, min_terms=1):
+        results = []
+        for score, row in top_matches(self.weighted, self.idf, message, k, min_terms):
+            results.append((score, int(self.ids[row]), self.question(row), self.answer(row)))
+        return results
+
+    def best(self, message, threshold, min_terms=1):
+        results = self.search(message, k=1, min_terms=min_terms)
+        if results and results[0][0] >= threshold:
+            return results[0][3]
+        return None
+
+    def question(self, row):
+        return bytes(self._questions[self._question_offsets[row]:self._question_offsets[row + 1]]).decode('utf-8')
+
+    def answer(self, row):
+        return bytes(self._answers[self._answer_offsets[row]:self._answer_offsets[row + 1]]).decode('utf-8')
+
+    def _row(self, faq_id):
+        return int(np.searchsorted(self.ids, faq_id))
+
+
+def _cast(view, header, data_start, name, fmt):
+    section = header['sections'][name]
+    start = data_start + section['offset']
+    size = int(np.prod(section['shape'])) * np.dtype(section['dtype']).itemsize if section['shape'] else 0
+    return view[start:start + size].cast(fmt)
+
+
+class KnowledgeStore:
+    """Serves FAQ lookups from the current snapshot and swaps in newer ones.
+
+    match(), best() and search() behave like FAQIndex and FAQRetriever, so
+    the app can use the store in their place.
+    """
+
+    def __init__(self, path, dim, reload_interval=1.0, on_reload=None):
+        self.path = path
+        self.dim = dim
+        self.reload_interval = reload_interval
+        self.on_reload = on_reload
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+        self.reloads = 0
+
+    def open(self, load_faqs, next_version):
+        """Map the existing snapshot, building it first if it is missing.
+
+        load_faqs and next_version are only called for a build, so a worker
+        starting against an existing snapshot does not read the faqs table.
+        """
+        try:
+            snapshot = Snapshot(self.path)
+        except (OSError, ValueError):
+            self.rebuild(load_faqs, next_version)
+            return
+        self._swap(snapshot)
+
+    def rebuild(self, load_faqs, next_version):
+        """Write a new snapshot from load_faqs() tagged with next_version() and map it."""
+        lock_file = open(self.path + '.lock', 'a')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Read the table inside the lock so concurrent rebuilds apply in order
+            faqs = load_faqs()
+            write_snapshot(self.path, faqs, next_version(), self.dim)
+        finally:
+            lock_file.close()
+        self._swap(Snapshot(self.path))
+
+    def current(self):
+        """Return the snapshot to use, picking up a newer file if one was written."""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if now - self._checked_at >= self.reload_interval:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+                if snapshot is None or (stat.st_ino, stat.st_mtime_ns) != (snapshot.stat.st_ino, snapshot.stat.st_mtime_ns):
+                    newer = Snapshot(self.path)
+                    if snapshot is None or newer.version >= snapshot.version:
+                        self._swap(newer)
+                        snapshot = newer
+            except (OSError, ValueError) as e:
+                print(f"Error reloading knowledge snapshot: {e}")
+        return snapshot
+
+    def match(self, message):
+        return self.current().match(message)
+
+    def best(self, message, threshold, min_terms=1):
+        return self.current().best(message, threshold, min_terms)
+
+    def search(self, message, k=3, min_terms=1):
+        return self.current().search(message, k, min_terms)
+
+    def __len__(self):
+        return len(self.current())
+
+    @property
+    def version(self):
+        return self.current().version
+
+    def _swap(self, snapshot):
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+        if previous is not None and self.on_reload is not None:
+            self.on_reload()
+
+
+def build(path=None):
+    """Rebuild the snapshot at path (default KNOWLEDGE_SNAPSHOT) from the faqs table."""
+    from config import Config
+    from database import bump_knowledge_version, get_faqs, init_db
+
+    path = path or Config.KNOWLEDGE_SNAPSHOT
+    if not path:
+        print("KNOWLEDGE_SNAPSHOT is not set")
+        sys.exit(1)
+    init_db()
+    store = KnowledgeStore(path, Config.RETRIEVAL_DIM)
+    store.rebuild(get_faqs, bump_knowledge_version)
+    print(f"Wrote {path}: {len(store)} FAQs, version {store.version}")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] != ['build'] or len(sys.argv) > 3:
+        print(__doc__)
+        sys.exit(1)
+    build(sys.argv[2] if len(sys.argv) == 3 else None)
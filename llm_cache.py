@@ -0,0 +1,185 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from database import get_cached_response, set_cached_response, delete_cached_response, clear_response_cache
+
+NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_question(text, variant=''):
+    """Lowercase and strip punctuation/extra spaces so near-identical questions share a key.
+
+    variant separates answers to the same question asked with different
+    conversation context.
+    """
+    key = NORMALIZE_RE.sub(' ', text.lower()).strip()
+    return f"{key}#{variant}" if variant else key
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class ResponseCache:
+    """Two-tier cache for LLM answers with single-flight request coalescing.
+
+    Answers live in an in-memory LRU with a TTL, backed by the
+    response_cache SQLite table so they survive restarts. Answers for a
+    variant belong to one user's conversation, so they stay in memory only
+    and never reach the shared table. Concurrent
+    requests for the same key wait on the first one instead of each calling
+    the upstream API.
+    """
+
+    def __init__(self, max_size=1024, ttl=86400):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        # Bumped by invalidate() so in-flight results computed against the
+        # old FAQ table are not written back
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_compute(self, question, compute, variant=''):
+        """Return the cached answer for question, calling compute() on a miss."""
+        key = normalize_question(question, variant)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            call = self._inflight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._inflight[key] = call
+                leader = True
+            generation = self._generation
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        response, created_at, hit = None, now, False
+        try:
+            row = None if variant else get_cached_response(key)
+            if row is not None and now - row[1] < self.ttl:
+                response, created_at, hit = row[0], row[1], True
+            else:
+                response, created_at, hit = compute(), time.time(), False
+                if not variant:
+                    self._persist(key, response, created_at, generation)
+            call.response = response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if call.error is None:
+                    if hit:
+                        self.hits += 1
+                    else:
+                        self.misses += 1
+                    if generation == self._generation:
+                        self._store(key, call.response, created_at)
+            call.done.set()
+        return call.response
+
+    def get(self, question, variant='', count_miss=True):
+        """Return the cached answer for question without computing it, or None.
+
+        Pass count_miss=False when a miss goes on to get_or_compute(), which
+        counts it.
+        """
+        key = normalize_question(question, variant)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if variant:
+                if count_miss:
+                    self.misses += 1
+                return None
+            generation = self._generation
+        row = get_cached_response(key)
+        with self._lock:
+            if row is not None and now - row[1] < self.ttl:
+                self.hits += 1
+                if generation == self._generation:
+                    self._store(key, row[0], row[1])
+                return row[0]
+            if count_miss:
+                self.misses += 1
+        return None
+
+    def put(self, question, response, variant=''):
+        """Store an answer computed outside get_or_compute(), e.g. a streamed reply."""
+        key = normalize_question(question, variant)
+        created_at = time.time()
+        with self._lock:
+            generation = self._generation
+        if not variant:
+            self._persist(key, response, created_at, generation)
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, response, created_at)
+
+    def invalidate(self, shared=True):
+        """Drop every cached answer, e.g. after the FAQ table changes.
+
+        With shared=False only this process's memory tier is dropped, for
+        when another process has already cleared the SQLite tier.
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        if shared:
+            clear_response_cache()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
+
+    def _persist(self, key, response, created_at, generation):
+        # invalidate() can bump the generation and clear the table between
+        # the check and the write, so check again after writing and take
+        # the stale row back out
+        with self._lock:
+            if generation != self._generation:
+                return
+        set_cached_response(key, response, created_at)
+        with self._lock:
+            current = generation == self._generation
+        if not current:
+            delete_cached_response(key)
+
+    def _store(self, key, response, created_at):
+        self._entries[key] = (response, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -0,0 +1,201 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Stops calling a failing upstream and lets one probe through periodically.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected. Once reset_timeout seconds have passed a single probe call
+    is allowed (half-open); its success closes the circuit, its failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class DeadlineCaller:
+    """Runs upstream calls in a thread pool under a hard deadline.
+
+    The caller gets control back after at most `timeout` seconds whatever the
+    upstream does; a call that overruns keeps its pool thread until it
+    finishes but no longer holds a request worker. If `hedge_after` is set, a
+    second identical call is started when the first has not answered by then
+    and whichever finishes first wins. stream() applies the same deadline to
+    the whole of a streamed reply; streams are not hedged.
+    """
+
+    def __init__(self, timeout=8.0, hedge_after=0, max_workers=8, breaker=None):
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.breaker = breaker
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.hedged = 0
+        self.short_circuited = 0
+
+    def call(self, fn):
+        if self.breaker is not None and not self.breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise CircuitOpenError("Upstream circuit is open")
+
+        with self._lock:
+            self.calls += 1
+        deadline = time.monotonic() + self.timeout
+        pending = {self._executor.submit(fn)}
+        hedged = False
+        error = None
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if self.hedge_after and not hedged:
+                wait_for = min(remaining, max(0, self.hedge_after - (self.timeout - remaining)))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if self.breaker is not None:
+                        self.breaker.record_success()
+                    return future.result()
+                error = future.exception()
+            if self.hedge_after and not hedged and pending and time.monotonic() < deadline:
+                hedged = True
+                with self._lock:
+                    self.hedged += 1
+                pending.add(self._executor.submit(fn))
+
+        for future in pending:
+            future.cancel()
+        if self.breaker is not None:
+            self.breaker.record_failure()
+        with self._lock:
+            if error is not None and not pending:
+                self.errors += 1
+            else:
+                self.timeouts += 1
+        if error is not None and not pending:
+            raise error
+        raise TimeoutError(f"Upstream call exceeded {self.timeout}s deadline")
+
+    def stream(self, fn):
+        """Yield the items of the iterator fn() returns, within the same deadline as call().
+
+        The upstream is read by a pool thread. Once `timeout` seconds have
+        passed since the call started, TimeoutError is raised even if the
+        upstream is still sending, and the pool thread closes the upstream
+        iterator at its next item.
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise CircuitOpenError("Upstream circuit is open")
+
+        with self._lock:
+            self.calls += 1
+        deadline = time.monotonic() + self.timeout
+        items = queue.Queue()
+        stop = threading.Event()
+
+        def produce():
+            iterator = None
+            try:
+                iterator = fn()
+                for item in iterator:
+                    if stop.is_set():
+                        break
+                    items.put(('item', item))
+                items.put(('done', None))
+            except Exception as e:
+                items.put(('error', e))
+            finally:
+                close = getattr(iterator, 'close', None)
+                if close is not None:
+                    close()
+
+        self._executor.submit(produce)
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise queue.Empty
+                    kind, value = items.get(timeout=remaining)
+                except queue.Empty:
+                    with self._lock:
+                        self.timeouts += 1
+                    if self.breaker is not None:
+                        self.breaker.record_failure()
+                    raise TimeoutError(f"Upstream stream exceeded {self.timeout}s deadline")
+                if kind == 'done':
+                    if self.breaker is not None:
+                        self.breaker.record_success()
+                    return
+                if kind == 'error':
+                    with self._lock:
+                        self.errors += 1
+                    if self.breaker is not None:
+                        self.breaker.record_failure()
+                    raise value
+                yield value
+        except GeneratorExit:
+            # The consumer stopped reading after an item arrived, so the
+            # upstream was working; this also settles a half-open probe
+            if self.breaker is not None:
+                self.breaker.record_success()
+            raise
+        finally:
+            stop.set()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'calls': self.calls,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'hedged': self.hedged,
+                'short_circuited': self.short_circuited,
+            }
+        if self.breaker is not None:
+            stats['circuit'] = self.breaker.state
+        return stats
@@ -0,0 +1,144 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from in-memory lookups up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Labelled latency histogram rendered in Prometheus text format.
+
+    observe() is a bisect plus three additions under a lock, cheap enough to
+    leave on for every request.
+    """
+
+    def __init__(self, name, help, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, label_value, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += seconds
+
+    @contextmanager
+    def time(self, label_value):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(label_value, time.perf_counter() - start)
+
+    def summary(self):
+        """Return {label: {'count', 'mean_ms', 'p95_ms'}}, p95 estimated from the buckets."""
+        with self._lock:
+            series = {key: (list(value[0]), value[1], value[2]) for key, value in self._series.items()}
+        result = {}
+        for key, (counts, count, total) in sorted(series.items()):
+            p95 = None
+            if count:
+                target = 0.95 * count
+                cumulative = 0
+                for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket
+                    if cumulative >= target:
+                        p95 = bound
+                        break
+            result[key] = {
+                'count': count,
+                'mean_ms': round(total / count * 1000, 2) if count else 0,
+                'p95_ms': round(p95 * 1000, 2) if p95 not in (None, float('inf')) else None,
+            }
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(value[0]), value[1], value[2]) for key, value in self._series.items()}
+        for key, (counts, count, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f'{self.name}_bucket{{{self.label}="{key}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{self.label}="{key}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{self.label}="{key}"}} {total}')
+            lines.append(f'{self.name}_count{{{self.label}="{key}"}} {count}')
+        return lines
+
+
+class Counter:
+    """Labelled monotonically increasing counter."""
+
+    def __init__(self, name, help, label):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, label_value, amount=1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(sorted(self._values.items()))
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in self.values().items():
+            lines.append(f'{self.name}{{{self.label}="{key}"}} {value}')
+        return lines
+
+
+def render_stats(name, help, label, stats, gauges=()):
+    """Render the numbers from a component's stats() dict.
+
+    Keys in gauges are current levels (queue length, cache size) and each
+    becomes its own {name}_{key} gauge; every other key is a monotonic count
+    and goes into one {name}_total counter labelled by key.
+    """
+    numbers = {key: value for key, value in stats.items()
+               if isinstance(value, (int, float)) and not isinstance(value, bool)}
+    lines = [f"# HELP {name}_total {help} events", f"# TYPE {name}_total counter"]
+    for key, value in numbers.items():
+        if key not in gauges:
+            lines.append(f'{name}_total{{{label}="{key}"}} {value}')
+    for key in gauges:
+        if key in numbers:
+            lines.append(f"# HELP {name}_{key} {help}: {key.replace('_', ' ')}")
+            lines.append(f"# TYPE {name}_{key} gauge")
+            lines.append(f"{name}_{key} {numbers[key]}")
+    return lines
+
+
+request_seconds = Histogram('chatbot_request_seconds', 'Time spent handling a request', 'route')
+stage_seconds = Histogram('chatbot_stage_seconds', 'Time spent in each answer pipeline stage', 'stage')
+db_seconds = Histogram('chatbot_db_seconds', 'Time spent in database.py calls', 'operation')
+answer_source = Counter('chatbot_answer_source_total', 'Replies by where the answer came from', 'source')
+
+
+def timed_db(fn):
+    """Decorator recording a database.py function's duration under its name."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            db_seconds.observe(name, time.perf_counter() - start)
+    return wrapper
@@ -0,0 +1,181 @@
+import re
+import threading
+import zlib
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Share of FAQ questions above which a term no longer counts towards min_terms
+COMMON_TERM_SHARE = 0.5
+
+STOP_WORDS = frozenset("""
+a an and are as at be can could do does for from have how i in is it me my
+of on or our please tell the there this to us we what when where which who
+will with would you your
+""".split())
+
+
+def stem(token):
+    # Crude plural folding so "scholarships" and "scholarship" share a term
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def hash_token(token, dim):
+    # crc32 rather than hash() so vectors are stable across processes
+    return zlib.crc32(token.encode('utf-8')) % dim
+
+
+def vectorize(text, dim):
+    """Hashed term-count vector of text."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in tokenize(text):
+        vector[hash_token(token, dim)] += 1
+    return vector
+
+
+def top_matches(weighted, idf, message, k, min_terms=1):
+    """Return [(score, row)] of the k rows of weighted most similar to message.
+
+    With min_terms > 1, rows must share min_terms distinct informative terms
+    with the message, or all of them if the message has fewer. Terms found
+    in more than COMMON_TERM_SHARE of the rows ("bbc", "college") are not
+    informative, so they cannot produce a confident match on their own, and
+    a message term no row has ("bus", "phd") still has to be matched.
+    """
+    if not len(weighted):
+        return []
+    query = vectorize(message, len(idf)) * idf
+    norm = np.linalg.norm(query)
+    if norm == 0:
+        return []
+    scores = weighted @ (query / norm)
+    if min_terms > 1:
+        present = weighted[:, query > 0] > 0
+        informative = present.sum(axis=0) <= max(1, int(len(weighted) * COMMON_TERM_SHARE))
+        required = max(1, min(min_terms, int(informative.sum())))
+        shared = np.count_nonzero(present[:, informative], axis=1)
+        scores[shared < required] = 0
+
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(float(scores[row]), int(row)) for row in top if scores[row] > 0]
+
+
+class FAQRetriever:
+    """TF-IDF retrieval over the FAQ questions using hashed term vectors.
+
+    Raw term counts are kept in a dense (n_faqs x dim) NumPy matrix together
+    with document frequencies, so admin edits only touch one row. The IDF
+    weighted, L2 normalised matrix is rebuilt by each edit, under the lock
+    edits take, and swapped in; search() only reads the current one, so it
+    never waits for an edit. Every query is scored against all FAQs with a
+    single matrix-vector product.
+    """
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._counts = np.zeros((0, dim), dtype=np.float32)
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._ids = []
+        self._rows = {}
+        self._entries = {}
+        self._weighted = self._build()
+
+    def load(self, faqs):
+        """Replace the index contents with rows from get_faqs()."""
+        with self._lock:
+            self._counts = np.zeros((len(faqs), self.dim), dtype=np.float32)
+            self._df = np.zeros(self.dim, dtype=np.float32)
+            self._ids = []
+            self._rows = {}
+            self._entries = {}
+            for faq in faqs:
+                row = len(self._ids)
+                self._ids.append(faq[0])
+                self._rows[faq[0]] = row
+                self._entries[faq[0]] = (faq[1], faq[2])
+                self._counts[row] = self._vectorize(faq[1])
+            self._df = (self._counts > 0).sum(axis=0).astype(np.float32)
+            self._weighted = self._build()
+
+    def add(self, faq_id, question, answer):
+        with self._lock:
+            vector = self._vectorize(question)
+            row = self._rows.get(faq_id)
+            if row is None:
+                row = len(self._ids)
+                self._ids.append(faq_id)
+                self._rows[faq_id] = row
+                self._counts = np.vstack([self._counts, vector])
+            else:
+                self._df -= self._counts[row] > 0
+                self._counts[row] = vector
+            self._df += vector > 0
+            self._entries[faq_id] = (question, answer)
+            self._weighted = self._build()
+
+    def update(self, faq_id, question, answer):
+        self.add(faq_id, question, answer)
+
+    def remove(self, faq_id):
+        with self._lock:
+            row = self._rows.pop(faq_id, None)
+            if row is None:
+                return
+            self._df -= self._counts[row] > 0
+            # Move the last row into the hole to keep the matrix dense
+            last = len(self._ids) - 1
+            if row != last:
+                self._counts[row] = self._counts[last]
+                self._ids[row] = self._ids[last]
+                self._rows[self._ids[row]] = row
+            self._counts = self._counts[:last]
+            self._ids.pop()
+            del self._entries[faq_id]
+            self._weighted = self._build()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def search(self, message, k=3, min_terms=1):
+        """Return up to k (score, faq_id, question, answer) tuples, best first."""
+        weighted, idf, ids, entries = self._weighted
+        results = []
+        for score, row in top_matches(weighted, idf, message, k, min_terms):
+            faq_id = ids[row]
+            question, answer = entries[faq_id]
+            results.append((score, faq_id, question, answer))
+        return results
+
+    def best(self, message, threshold, min_terms=1):
+        """Return the answer of the top FAQ if it scores at least threshold."""
+        results = self.search(message, k=1, min_terms=min_terms)
+        if results and results[0][0] >= threshold:
+            return results[0][3]
+        return None
+
+    def export_matrix(self):
+        """Return (weighted, idf, ids) for knowledge_snapshot."""
+        weighted, idf, ids, _ = self._weighted
+        return weighted, idf, ids
+
+    def _vectorize(self, text):
+        return vectorize(text, self.dim)
+
+    def _build(self):
+        n = len(self._ids)
+        idf = (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+        weighted = self._counts * idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        weighted /= norms
+        return weighted, idf, list(self._ids), dict(self._entries)
@@ -6,6 +6,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Admin functionality
     const addFaqForm = document.getElementById('addFaqForm');
+    const importFaqForm = document.getElementById('importFaqForm');
     const editFaqForm = document.getElementById('editFaqForm');
     const editModal = document.getElementById('editModal');
     const closeModal = document.querySelector('.close');
@@ -43,25 +44,30 @@ document.addEventListener('DOMContentLoaded', function() {
             chatMessages.appendChild(typingIndicator);
             scrollToBottom();
             
-            // Send to server and get AI response
+            // Send to server and stream the AI response as it is generated
             fetch('/send_message', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ message: message })
+                body: JSON.stringify({ message: message, stream: true })
             })
-            .then(response => response.json())
-            .then(data => {
-                // Remove typing indicator
-                const indicator = document.getElementById('typing-indicator');
-                if (indicator) indicator.remove();
-                
-                if (data.status === 'success') {
-                    addMessageToChat('ai', data.response);
-                } else {
-                    addMessageToChat('ai', 'Sorry, I encountered an error. Please try again.');
+            .then(response => {
+                const contentType = response.headers.get('Content-Type') || '';
+                if (!response.body || !contentType.startsWith('text/event-stream')) {
+                    return response.json().then(data => {
+                        // Remove typing indicator
+                        const indicator = document.getElementById('typing-indicator');
+                        if (indicator) indicator.remove();
+                        
+                        if (data.status === 'success') {
+                            addMessageToChat('ai', data.response);
+                        } else {
+                            addMessageToChat('ai', 'Sorry, I encountered an error. Please try again.');
+                        }
+                    });
                 }
+                return readStream(response.body.getReader());
             })
             .catch(error => {
                 console.error('Error:', error);
@@ -73,8 +79,48 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         }
         
-        // Add message to chat UI
-        function addMessageToChat(sender, message) {
+        // Render server-sent tokens into a single AI message as they arrive
+        function readStream(reader) {
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let messageP = null;
+            
+            function handleEvent(event) {
+                if (!event.startsWith('data: ')) return;
+                const data = JSON.parse(event.slice(6));
+                if (data.token === undefined) return;
+                
+                if (!messageP) {
+                    // Swap the typing indicator for the reply on the first token
+                    const indicator = document.getElementById('typing-indicator');
+                    if (indicator) indicator.remove();
+                    messageP = addMessageToChat('ai', '');
+                }
+                messageP.textContent += data.token;
+                scrollToBottom();
+            }
+            
+            function read() {
+                return reader.read().then(({ done, value }) => {
+                    if (done) {
+                        if (!messageP) {
+                            throw new Error('Empty response stream');
+                        }
+                        return;
+                    }
+                    buffer += decoder.decode(value, { stream: true });
+                    const events = buffer.split('\n\n');
+                    buffer = events.pop();
+                    events.forEach(handleEvent);
+                    return read();
+                });
+            }
+            
+            return read();
+        }
+        
+        // Build a chat message element
+        function createMessage(sender, message) {
             const messageDiv = document.createElement('div');
             messageDiv.className = `message ${sender}-message`;
             
@@ -86,11 +132,56 @@ document.addEventListener('DOMContentLoaded', function() {
             
             contentDiv.appendChild(messageP);
             messageDiv.appendChild(contentDiv);
+            return messageDiv;
+        }
+        
+        // Add message to chat UI
+        function addMessageToChat(sender, message) {
+            const messageDiv = createMessage(sender, message);
             chatMessages.appendChild(messageDiv);
             
             scrollToBottom();
+            return messageDiv.querySelector('p');
         }
         
+        // Load older messages when the user scrolls to the top of the chat
+        let historyCursor = chatMessages.dataset.historyCursor;
+        let loadingHistory = false;
+        
+        function loadOlderMessages() {
+            if (!historyCursor || loadingHistory) return;
+            loadingHistory = true;
+            
+            fetch(`/chat/history?before=${encodeURIComponent(historyCursor)}`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'success') return;
+                
+                // Keep the visible messages in place while prepending
+                const previousHeight = chatMessages.scrollHeight;
+                const fragment = document.createDocumentFragment();
+                data.messages.forEach(item => {
+                    fragment.appendChild(createMessage(item.sender === 'user' ? 'user' : 'ai', item.message));
+                });
+                chatMessages.insertBefore(fragment, chatMessages.firstChild);
+                chatMessages.scrollTop += chatMessages.scrollHeight - previousHeight;
+                
+                historyCursor = data.next_cursor;
+            })
+            .catch(error => {
+                console.error('Error:', error);
+            })
+            .finally(() => {
+                loadingHistory = false;
+            });
+        }
+        
+        chatMessages.addEventListener('scroll', function() {
+            if (chatMessages.scrollTop < 50) {
+                loadOlderMessages();
+            }
+        });
+        
         // Event listeners
         sendButton.addEventListener('click', sendMessage);
         
@@ -160,6 +251,33 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    if (importFaqForm) {
+        importFaqForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            
+            const formData = new FormData();
+            formData.append('file', document.getElementById('importFile').files[0]);
+            
+            fetch('/admin/import_faqs', {
+                method: 'POST',
+                body: formData
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.status === 'success') {
+                    alert(`Imported ${data.added} FAQs (${data.skipped} duplicates or empty rows skipped)`);
+                    window.location.reload();
+                } else {
+                    alert('Error importing FAQs: ' + data.message);
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Error importing FAQs. Please try again.');
+            });
+        });
+    }
+    
     // Modal functionality
     if (closeModal) {
         closeModal.addEventListener('click', function() {
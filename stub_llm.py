@@ -0,0 +1,116 @@
+"""Local stand-in for the OpenAI completions API.
+
+Serves /v1/completions (and /v1/engines/<engine>/completions) with canned
+answers after a configurable delay, optionally failing a share of
+requests, so the LLM path can be exercised without network access or an
+API key. Point the app at it with OPENAI_API_BASE=http://127.0.0.1:<port>/v1
+and any OPENAI_API_KEY value.
+
+    python stub_llm.py --port 8001 --latency 1.5 --failure-rate 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubCompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.endswith('/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+
+        server = self.server
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        if random.random() < server.failure_rate:
+            self._send_json(500, {'error': {'message': 'Stub failure', 'type': 'server_error'}})
+            return
+
+        prompt = body.get('prompt', '')
+        question = prompt.rsplit('User question:', 1)[-1].split('\n', 1)[0].strip()
+        text = f" This is a stub answer about BBC College for: {question}"
+        server.completions += 1
+
+        if body.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for word in text.split(' '):
+                self._send_event(self._completion(body, word + ' ', None))
+                time.sleep(server.token_delay)
+            self._send_event(self._completion(body, '', 'stop'))
+            self.wfile.write(b'data: [DONE]\n\n')
+            self.close_connection = True
+            return
+
+        self._send_json(200, self._completion(body, text, 'stop'))
+
+    def _completion(self, body, text, finish_reason):
+        return {
+            'id': 'cmpl-stub',
+            'object': 'text_completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{'text': text, 'index': 0, 'logprobs': None, 'finish_reason': finish_reason}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }
+
+    def _send_event(self, payload):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up on a slow answer (deadline, hedging) are expected
+        pass
+
+
+def start_stub_server(port=0, latency=0.5, jitter=0.0, failure_rate=0.0, token_delay=0.02):
+    """Start the stub in a daemon thread and return the server; its URL is server.api_base."""
+    server = StubServer(('127.0.0.1', port), StubCompletionHandler)
+    server.latency = latency
+    server.jitter = jitter
+    server.failure_rate = failure_rate
+    server.token_delay = token_delay
+    server.completions = 0
+    server.api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds before answering')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random delay, seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='share of requests answered with HTTP 500')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='delay between streamed tokens')
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.jitter, args.failure_rate, args.token_delay)
+    print(f"Stub completions API listening on {server.api_base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
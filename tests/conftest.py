@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from database import close_db_connection, init_db
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh database and archive file for the test, with the default admin as user 1."""
+    monkeypatch.setattr(Config, 'DATABASE', str(tmp_path / 'chatbot.db'))
+    monkeypatch.setattr(Config, 'CHAT_ARCHIVE_DATABASE', str(tmp_path / 'archive.db'))
+    init_db()
+    yield Config.DATABASE
+    close_db_connection()
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionGate, OverloadedError, RateLimiter
+
+
+def wait_until(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def test_rate_limiter_allows_a_burst_per_key():
+    limiter = RateLimiter(rate=0.001, burst=2)
+    assert limiter.allow('alice')
+    assert limiter.allow('alice')
+    assert not limiter.allow('alice')
+    assert limiter.allow('bob')
+    assert limiter.stats() == {'allowed': 3, 'limited': 1, 'tracked_keys': 2}
+
+
+def test_rate_limiter_refills_over_time():
+    limiter = RateLimiter(rate=20, burst=1)
+    assert limiter.allow('alice')
+    assert not limiter.allow('alice')
+    time.sleep(0.06)
+    assert limiter.allow('alice')
+
+
+def test_rate_limiter_tracks_at_most_max_keys():
+    limiter = RateLimiter(rate=0.001, burst=1, max_keys=2)
+    for key in ('a', 'b', 'c'):
+        assert limiter.allow(key)
+    assert limiter.stats()['tracked_keys'] == 2
+    # 'a' was evicted, so it starts again with a full bucket
+    assert limiter.allow('a')
+
+
+def test_zero_rate_disables_limiting():
+    limiter = RateLimiter(rate=0, burst=0)
+    assert all(limiter.allow('alice') for _ in range(100))
+
+
+def test_gate_queues_then_sheds_when_the_queue_is_full():
+    gate = AdmissionGate(max_active=1, max_waiting=1, wait_timeout=2)
+    assert gate.acquire()
+
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(gate.acquire()))
+    waiter.start()
+    wait_until(lambda: gate.stats()['waiting'] == 1)
+
+    assert not gate.acquire()
+    gate.release()
+    waiter.join()
+    assert admitted == [True]
+
+    stats = gate.stats()
+    assert stats['active'] == 1
+    assert stats['admitted'] == 2
+    assert stats['queued'] == 1
+    assert stats['shed_queue_full'] == 1
+
+
+def test_gate_sheds_after_wait_timeout():
+    gate = AdmissionGate(max_active=1, max_waiting=5, wait_timeout=0.05)
+    assert gate.acquire()
+    start = time.monotonic()
+    assert not gate.acquire()
+    assert time.monotonic() - start >= 0.05
+    assert gate.stats()['shed_timeout'] == 1
+    assert gate.stats()['waiting'] == 0
+
+
+def test_gate_call_raises_when_shed_and_releases_its_slot():
+    gate = AdmissionGate(max_active=1, max_waiting=0, wait_timeout=1)
+    assert gate.call(lambda: 'ok') == 'ok'
+    assert gate.stats()['active'] == 0
+
+    gate.acquire()
+    with pytest.raises(OverloadedError):
+        gate.call(lambda: 'not called')
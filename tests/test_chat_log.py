@@ -0,0 +1,50 @@
+import time
+
+from chat_log import ChatLogWriter
+from database import get_chat_page
+
+
+def test_flush_writes_queued_rows_in_order(db):
+    writer = ChatLogWriter(batch_size=100, flush_interval=10)
+    try:
+        timestamp = writer.add(1, 'user', 'hello')
+        assert writer.add(1, 'ai', 'hi there', timestamp) == timestamp
+        writer.flush()
+        rows, has_more = get_chat_page(1, 10)
+        assert [(row[0], row[1], row[2]) for row in rows] == [('user', 'hello', timestamp),
+                                                             ('ai', 'hi there', timestamp)]
+        assert not has_more
+        assert writer.stats()['written'] == 2
+        assert writer.stats()['batches'] == 1
+    finally:
+        writer.close()
+
+
+def test_full_batch_is_written_without_flush(db):
+    writer = ChatLogWriter(batch_size=2, flush_interval=10)
+    try:
+        writer.add(1, 'user', 'one')
+        writer.add(1, 'ai', 'two')
+        deadline = time.monotonic() + 2
+        while writer.stats()['written'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(get_chat_page(1, 10)[0]) == 2
+    finally:
+        writer.close()
+
+
+def test_flush_with_nothing_queued_returns_at_once(db):
+    writer = ChatLogWriter()
+    try:
+        start = time.monotonic()
+        writer.flush()
+        assert time.monotonic() - start < 0.1
+    finally:
+        writer.close()
+
+
+def test_close_writes_remaining_rows(db):
+    writer = ChatLogWriter(batch_size=100, flush_interval=10)
+    writer.add(1, 'user', 'last words')
+    writer.close()
+    assert [row[1] for row in get_chat_page(1, 10)[0]] == ['last words']
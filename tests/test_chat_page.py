@@ -0,0 +1,63 @@
+from database import add_chat_messages, archive_chat_block, get_chat_page, get_db_connection
+
+CUTOFF = '2024-01-01 00:00:00'
+
+
+def seed(user_id=1):
+    """Ten archivable messages from 2023 followed by three recent ones."""
+    rows = [(user_id, 'user' if i % 2 == 0 else 'ai', f'old {i}', f'2023-06-01 10:00:{i:02d}') for i in range(10)]
+    rows += [(user_id, 'user', f'new {i}', f'2025-01-01 10:00:{i:02d}') for i in range(3)]
+    add_chat_messages(rows)
+    return [row[2] for row in rows]
+
+
+def read_all(user_id, limit):
+    messages, before, pages = [], None, 0
+    while True:
+        rows, has_more = get_chat_page(user_id, limit, before)
+        pages += 1
+        messages[:0] = [row[1] for row in rows]
+        if not has_more:
+            return messages, pages
+        before = (rows[0][2], rows[0][3])
+
+
+def test_pages_through_hot_history(db):
+    expected = seed()
+    messages, pages = read_all(1, 4)
+    assert messages == expected
+    assert pages == 4
+
+
+def test_first_page_is_the_newest_messages(db):
+    seed()
+    rows, has_more = get_chat_page(1, 2)
+    assert [row[1] for row in rows] == ['new 1', 'new 2']
+    assert has_more
+
+
+def test_pages_continue_into_the_archive(db):
+    expected = seed()
+    moved = 0
+    while True:
+        count = archive_chat_block(1, CUTOFF, 4)
+        moved += count
+        if count < 4:
+            break
+    assert moved == 10
+    remaining = get_db_connection().execute("SELECT COUNT(*) FROM chat_history WHERE user_id=1").fetchone()[0]
+    assert remaining == 3
+
+    for limit in (1, 2, 3, 5, 20):
+        messages, _ = read_all(1, limit)
+        assert messages == expected, limit
+
+
+def test_archive_keeps_users_apart(db):
+    seed(1)
+    add_chat_messages([(2, 'user', 'other user', '2023-06-01 10:00:00')])
+    while archive_chat_block(1, CUTOFF, 4) == 4:
+        pass
+    archive_chat_block(2, CUTOFF, 4)
+    assert read_all(2, 5)[0] == ['other user']
+    assert get_chat_page(3, 5) == ([], False)
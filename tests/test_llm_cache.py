@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from database import get_cached_response
+from llm_cache import ResponseCache, normalize_question
+
+
+def test_normalize_question_ignores_case_and_punctuation():
+    assert normalize_question("  Is there a BUS service?? ") == normalize_question("is there a bus service")
+    assert normalize_question("Fees?", 'abc') == 'fees#abc'
+
+
+def test_answer_is_computed_once_and_shared_through_sqlite(db):
+    calls = []
+    cache = ResponseCache()
+    assert cache.get_or_compute("Is there a bus?", lambda: calls.append(1) or 'Yes') == 'Yes'
+    assert cache.get_or_compute("is there a bus", lambda: calls.append(1) or 'No') == 'Yes'
+    assert len(calls) == 1
+
+    # Another process starts with an empty memory tier but shares the table
+    other = ResponseCache()
+    assert other.get("Is there a bus?") == 'Yes'
+    assert other.stats()['hits'] == 1
+
+
+def test_concurrent_misses_are_coalesced(db):
+    calls = []
+    cache = ResponseCache()
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'answer'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("q", compute)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['answer'] * 5
+    assert len(calls) == 1
+    assert cache.stats()['coalesced'] == 4
+
+
+def test_errors_are_not_cached(db):
+    cache = ResponseCache()
+
+    def compute():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("q", compute)
+    assert cache.get_or_compute("q", lambda: 'answer') == 'answer'
+
+
+def test_invalidate_clears_both_tiers(db):
+    cache = ResponseCache()
+    cache.put("q", 'answer')
+    cache.invalidate()
+    assert cache.get("q") is None
+    assert get_cached_response(normalize_question("q")) is None
+
+
+def test_answer_computed_across_invalidate_is_dropped(db):
+    cache = ResponseCache()
+
+    def compute():
+        cache.invalidate()
+        return 'stale'
+
+    assert cache.get_or_compute("q", compute) == 'stale'
+    assert cache.get("q") is None
+    assert get_cached_response(normalize_question("q")) is None
+
+
+def test_context_answers_stay_in_memory(db):
+    cache = ResponseCache()
+    cache.put("what about its fees", 'answer', 'context-1')
+    assert cache.get("what about its fees", 'context-1') == 'answer'
+    assert cache.get("what about its fees", 'context-2') is None
+    assert get_cached_response(normalize_question("what about its fees", 'context-1')) is None
+
+
+def test_entries_expire_and_memory_tier_is_bounded():
+    cache = ResponseCache(max_size=2, ttl=0)
+    assert cache.get_or_compute("a", lambda: '1', 'v') == '1'
+    assert cache.get_or_compute("a", lambda: '2', 'v') == '2'
+
+    cache = ResponseCache(max_size=2)
+    for question in ('a', 'b', 'c'):
+        cache.put(question, question, 'v')
+    assert cache.stats()['size'] == 2
+    assert cache.get('a', 'v') is None
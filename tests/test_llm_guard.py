@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from llm_guard import CircuitBreaker, CircuitOpenError, DeadlineCaller
+
+
+def failing():
+    raise ValueError("upstream failed")
+
+
+def test_call_returns_result():
+    caller = DeadlineCaller(timeout=1)
+    assert caller.call(lambda: 42) == 42
+    assert caller.stats()['calls'] == 1
+
+
+def test_call_gives_up_at_the_deadline():
+    caller = DeadlineCaller(timeout=0.1)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        caller.call(lambda: time.sleep(1))
+    assert time.monotonic() - start < 0.5
+    assert caller.stats()['timeouts'] == 1
+
+
+def test_call_reraises_upstream_errors():
+    caller = DeadlineCaller(timeout=1)
+    with pytest.raises(ValueError):
+        caller.call(failing)
+    assert caller.stats()['errors'] == 1
+
+
+def test_hedged_call_takes_the_faster_answer():
+    lock = threading.Lock()
+    started = []
+
+    def upstream():
+        with lock:
+            started.append(1)
+            first = len(started) == 1
+        if first:
+            time.sleep(1)
+            return 'slow'
+        return 'fast'
+
+    caller = DeadlineCaller(timeout=2, hedge_after=0.05)
+    start = time.monotonic()
+    assert caller.call(upstream) == 'fast'
+    assert time.monotonic() - start < 0.5
+    assert caller.stats()['hedged'] == 1
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    caller = DeadlineCaller(timeout=1, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            caller.call(failing)
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda: 'not called')
+    assert breaker.state == 'open'
+    assert caller.stats()['short_circuited'] == 1
+
+
+def test_half_open_probe_closes_or_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    caller = DeadlineCaller(timeout=1, breaker=breaker)
+    with pytest.raises(ValueError):
+        caller.call(failing)
+    time.sleep(0.06)
+    with pytest.raises(ValueError):
+        caller.call(failing)
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only one probe is let through while half open
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_stream_yields_every_item():
+    caller = DeadlineCaller(timeout=1)
+    assert list(caller.stream(lambda: iter(['a', 'b', 'c']))) == ['a', 'b', 'c']
+
+
+def test_stream_deadline_covers_the_whole_reply():
+    def slow_tokens():
+        for token in ['a', 'b', 'c', 'd']:
+            time.sleep(0.1)
+            yield token
+
+    caller = DeadlineCaller(timeout=0.25)
+    received = []
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        for token in caller.stream(slow_tokens):
+            received.append(token)
+    assert time.monotonic() - start < 0.4
+    assert received == ['a', 'b']
+    assert caller.stats()['timeouts'] == 1
+
+
+def test_stream_error_counts_as_failure():
+    def broken():
+        yield 'a'
+        raise ValueError("connection reset")
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    caller = DeadlineCaller(timeout=1, breaker=breaker)
+    with pytest.raises(ValueError):
+        list(caller.stream(broken))
+    assert breaker.state == 'open'
+    assert caller.stats()['errors'] == 1
+
+
+def test_stream_closed_by_consumer_settles_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    caller = DeadlineCaller(timeout=1, breaker=breaker)
+    chunks = caller.stream(lambda: iter(['a', 'b', 'c']))
+    assert next(chunks) == 'a'
+    chunks.close()
+    assert breaker.state == 'closed'